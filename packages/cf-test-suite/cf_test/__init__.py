@@ -2,8 +2,10 @@
 """
 Crystal Forge Test Package - Simple pytest-based testing
 """
+import base64
 import json
 import os
+import re
 import shlex
 import subprocess
 import tempfile
@@ -15,7 +17,8 @@ from typing import Any, Dict, List, Optional, Union
 
 import psycopg2
 import pytest
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import RealDictCursor, execute_values
 
 
 @dataclass
@@ -56,10 +59,21 @@ class CFTestClient:
     def __init__(self, config: Optional[CFTestConfig] = None):
         self.config = config or CFTestConfig()
         self._conn = None
+        # SQL text -> server-side prepared statement name, per connection
+        self._prepared: Dict[str, str] = {}
+        # derivation_statuses id -> name, loaded once by the scenario helpers
+        self._derivation_statuses: Optional[Dict[int, str]] = None
 
     @contextmanager
     def db_connection(self):
-        if self._conn is None:
+        """Yield the client's persistent connection, opening it on first use
+
+        The connection is reused across calls and closed by ``close()``. If a
+        statement fails, the transaction is rolled back so the connection
+        stays usable; a connection the server dropped is reopened on the next
+        call.
+        """
+        if self._conn is None or self._conn.closed:
             conn_params = {
                 "host": self.config.db_host,
                 "port": self.config.db_port,
@@ -80,24 +94,141 @@ class CFTestClient:
                 conn_params["password"] = ""  # VM postgres has no password
 
             self._conn = psycopg2.connect(**conn_params)
+            self._prepared = {}
+            # Test rows are throwaway: don't wait for the WAL flush on commit.
+            # "off" rather than "local": the test database has no replicas, so
+            # "local" behaves exactly like "on" and would still wait. Rows
+            # committed this way are visible to the server and builder at once.
+            with self._conn.cursor() as cur:
+                cur.execute("SET synchronous_commit = off")
+            self._conn.commit()
         try:
             yield self._conn
-        finally:
-            if self._conn:
+        except Exception:
+            try:
+                self._conn.rollback()
+            except psycopg2.Error:
+                self.close()
+            raise
+
+    def close(self) -> None:
+        """Close the persistent database connection, if open"""
+        if self._conn is not None:
+            if not self._conn.closed:
                 self._conn.close()
-                self._conn = None
+            self._conn = None
+
+    @staticmethod
+    @contextmanager
+    def _autocommit(conn):
+        """Run a self-contained statement in autocommit mode
+
+        Otherwise psycopg2 sends a separate BEGIN ahead of the statement and
+        the caller's COMMIT after it, three round trips instead of one. Left
+        alone if a transaction is already open on the connection.
+        """
+        if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            yield
+            return
+        conn.autocommit = True
+        try:
+            yield
+        finally:
+            if not conn.closed:
+                conn.autocommit = False
 
     def execute_sql(
         self, sql: str, params: Optional[tuple] = None
     ) -> List[Dict[str, Any]]:
         """Execute SQL and return results as list of dicts; always commit the statement."""
-        with self.db_connection() as conn:
+        with self.db_connection() as conn, self._autocommit(conn):
             with conn.cursor() as cur:
                 cur.execute(sql, params)
                 rows = [dict(row) for row in cur.fetchall()] if cur.description else []
                 conn.commit()
                 return rows
 
+    def execute_prepared(
+        self, sql: str, params: Optional[tuple] = None
+    ) -> List[Dict[str, Any]]:
+        """Like ``execute_sql``, but parse and plan ``sql`` once per connection
+
+        The first call PREPAREs the statement server-side (``%s`` placeholders
+        become ``$1..$n``); later calls with the same SQL text only EXECUTE it.
+        """
+        with self.db_connection() as conn, self._autocommit(conn):
+            with conn.cursor() as cur:
+                name = self._prepared.get(sql)
+                if name is None:
+                    name = f"cf_stmt_{len(self._prepared)}"
+                    counter = iter(range(1, sql.count("%s") + 1))
+                    body = re.sub(
+                        r"%([s%])",
+                        lambda m: f"${next(counter)}" if m.group(1) == "s" else "%",
+                        sql,
+                    )
+                    cur.execute(f"PREPARE {name} AS {body}")
+                    conn.commit()
+                    self._prepared[sql] = name
+                args = params or ()
+                if args:
+                    cur.execute(
+                        f"EXECUTE {name} ({', '.join(['%s'] * len(args))})", args
+                    )
+                else:
+                    cur.execute(f"EXECUTE {name}")
+                rows = [dict(row) for row in cur.fetchall()] if cur.description else []
+                conn.commit()
+                return rows
+
+    def execute_many_returning(
+        self, sql: str, rows: List[tuple], template: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Insert many rows with one multi-row statement and return its results
+
+        ``sql`` carries a single ``VALUES %s`` placeholder, expanded by
+        psycopg2's ``execute_values`` (``template`` shapes each row, e.g. to
+        wrap a column in SQL). Rows come back in ``RETURNING`` order.
+        """
+        with self.db_connection() as conn:
+            with conn.cursor() as cur:
+                result = execute_values(cur, sql, rows, template=template, fetch=True)
+                conn.commit()
+                return [dict(row) for row in result]
+
+    def wait_for_commits(
+        self,
+        flake_id: int,
+        count: int,
+        timeout: float = 120,
+        git_commit_hash: Optional[str] = None,
+    ) -> int:
+        """Block until ``flake_id`` has ``count`` commits (and ``git_commit_hash``)
+
+        Each poll is one query; the delay between polls backs off from 0.25s
+        up to 2s. Returns the last count seen; on timeout it is below
+        ``count`` (or the hash is missing) and the caller asserts.
+        """
+        deadline = time.time() + timeout
+        delay = 0.25  # back off 0.25s, 0.5s, 1s, ... capped at 2s
+        while True:
+            row = self.execute_sql(
+                """
+                SELECT COUNT(*) AS count,
+                       COALESCE(%s IS NULL OR bool_or(git_commit_hash = %s), FALSE)
+                           AS seen
+                FROM commits WHERE flake_id = %s
+                """,
+                (git_commit_hash, git_commit_hash, flake_id),
+            )[0]
+            if row["count"] >= count and row["seen"]:
+                return row["count"]
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return row["count"]
+            time.sleep(min(delay, remaining))
+            delay = min(2.0, delay * 2)
+
     # VM Testing Helpers
     def wait_until_succeeds(
         self, machine, cmd: str, timeout: int = 120, interval: float = 1.0
@@ -121,23 +252,16 @@ class CFTestClient:
         db_name: str = "crystal_forge",
         db_user: str = "crystal_forge",
     ) -> str:
-        """Execute SQL query on a VM via psql command using temporary file"""
-        temp_sql_path = f"/tmp/query_{os.getpid()}_{int(time.time())}.sql"
-
-        # Write the SQL to a file on the VM
-        machine.succeed(f"cat > {temp_sql_path} << 'EOF'\n{sql}\nEOF")
-
-        try:
-            # Execute the SQL file
-            result = self.wait_until_succeeds(
-                machine,
-                f"sudo -u {db_user} psql -d {db_name} -At -f {temp_sql_path}",
-                timeout=timeout,
-            )
-            return result
-        finally:
-            # Clean up the temporary file
-            machine.succeed(f"rm -f {temp_sql_path}")
+        """Execute SQL query on a VM via psql, feeding the SQL on stdin"""
+        # The SQL travels base64-encoded and is decoded in the VM, so it needs
+        # no shell quoting and can't cut a heredoc short with a stray "EOF"
+        payload = base64.b64encode(sql.encode()).decode()
+        return self.wait_until_succeeds(
+            machine,
+            f"echo {payload} | base64 -d | "
+            f"sudo -u {db_user} psql -d {db_name} -At -f -",
+            timeout=timeout,
+        )
 
     def db_query_on_vm_simple(
         self,
@@ -152,15 +276,72 @@ class CFTestClient:
         cmd = f"sudo -u {db_user} psql -d {db_name} -At -c $'{sql_escaped}'"
         return self.wait_until_succeeds(machine, cmd, timeout=timeout)
 
+    def journal_cursor(self, machine, service_name: str) -> Optional[str]:
+        """Return the journal cursor of the newest entry for a unit (None if empty)"""
+        out = machine.succeed(
+            f"journalctl -u {shlex.quote(service_name)} -n 1 -o cat "
+            "--show-cursor --no-pager || true"
+        )
+        for line in reversed(out.splitlines()):
+            if line.startswith("-- cursor: "):
+                return line[len("-- cursor: ") :].strip()
+        return None
+
     def wait_for_service_log(
-        self, machine, service_name: str, log_pattern: str, timeout: int = 120
-    ) -> None:
-        """Wait for a specific pattern to appear in service logs"""
-        self.wait_until_succeeds(
-            machine,
-            f"journalctl -u {service_name} | grep '{log_pattern}'",
-            timeout=timeout,
+        self,
+        machine,
+        service_name: str,
+        log_pattern: Union[str, List[str], "re.Pattern[str]"],
+        timeout: int = 120,
+        after_cursor: Optional[str] = None,
+    ) -> str:
+        """Wait for a specific pattern to appear in service logs
+
+        Follows the unit's journal once (``journalctl -f``) inside the VM and
+        returns on the first matching line, instead of re-reading the whole
+        journal on every poll. With ``after_cursor`` (see ``journal_cursor``)
+        only entries written after that point are scanned.
+
+        ``log_pattern`` may be a list of alternatives; the wait ends on the
+        first line matching any of them. A precompiled ``re.Pattern`` is
+        matched as one extended regex (keep it to POSIX ERE syntax); grep
+        cannot honour Python regex flags, so a pattern compiled with any is
+        rejected. Returns the matching log line.
+        """
+        if isinstance(log_pattern, re.Pattern):
+            if log_pattern.flags & ~re.UNICODE:
+                raise ValueError(
+                    f"Regex flags are not supported by wait_for_service_log: "
+                    f"{log_pattern!r}"
+                )
+            patterns = [log_pattern.pattern]
+            grep_args = f"-E -e {shlex.quote(log_pattern.pattern)}"
+        else:
+            patterns = [log_pattern] if isinstance(log_pattern, str) else log_pattern
+            grep_args = " ".join(f"-e {shlex.quote(p)}" for p in patterns)
+        if after_cursor:
+            start = f"--after-cursor={shlex.quote(after_cursor)}"
+        else:
+            start = "-n all"
+        script = "\n".join(
+            [
+                f"exec 3< <(timeout {timeout} journalctl -u {shlex.quote(service_name)}"
+                f" -f {start} -o cat --no-pager 2>/dev/null)",
+                "follower=$!",
+                f"rc=0; grep -m1 {grep_args} <&3 || rc=$?",
+                'kill "$follower" 2>/dev/null || true',
+                'exit "$rc"',
+            ]
         )
+        code, out = machine.execute(
+            f"bash -c {shlex.quote(script)}", timeout=timeout + 30
+        )
+        if code != 0:
+            raise AssertionError(
+                f"Timed out after {timeout}s waiting for {patterns} "
+                f"in {service_name} logs"
+            )
+        return out.strip()
 
     def send_webhook(self, machine, port: int, payload: dict) -> str:
         """Send webhook payload to server"""
@@ -300,7 +481,9 @@ def cf_config():
 @pytest.fixture(scope="session")
 def cf_client(cf_config):
     """Crystal Forge test client"""
-    return CFTestClient(cf_config)
+    client = CFTestClient(cf_config)
+    yield client
+    client.close()
 
 
 @pytest.fixture
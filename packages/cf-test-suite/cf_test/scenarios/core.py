@@ -12,11 +12,31 @@ def _one_row(client: CFTestClient, sql: str, params: Tuple[Any, ...]) -> Dict[st
     return rows[0] if rows else {}
 
 
+def _status_names(client: CFTestClient) -> Dict[int, str]:
+    """Map derivation status ids to names (cached on the client; the table is static per run)."""
+    if client._derivation_statuses is None:
+        rows = client.execute_sql("SELECT id, name FROM public.derivation_statuses")
+        client._derivation_statuses = {row["id"]: row["name"] for row in rows}
+    return client._derivation_statuses
+
+
+def _status_id(client: CFTestClient, name: str) -> int:
+    """Look up a derivation status id by name (cached with ``_status_names``)."""
+    for status_id, status_name in _status_names(client).items():
+        if status_name == name:
+            return status_id
+    raise ValueError(f"Unknown derivation status: {name}")
+
+
 def _cleanup_fn(client: CFTestClient, patterns: Dict[str, List[str]]):
     """Return a callable that cleans up using CFTestClient.cleanup_test_data()."""
     return lambda: client.cleanup_test_data(patterns)
 
 
+# Default for _create_base_scenario's derivation_path, where None means NULL
+_GENERATED_PATH = object()
+
+
 def _create_base_scenario(
     client: CFTestClient,
     *,
@@ -27,6 +47,8 @@ def _create_base_scenario(
     commit_age_hours: int = 1,
     derivation_status: str = "dry-run-pending",
     derivation_error: Optional[str] = None,
+    derivation_path: Any = _GENERATED_PATH,
+    attempt_count: int = 0,
     heartbeat_age_minutes: Optional[int] = 5,
     system_ip: str = "192.168.1.100",
     agent_version: str = "2.0.0",
@@ -43,6 +65,9 @@ def _create_base_scenario(
         commit_age_hours: How many hours ago the commit was made
         derivation_status: Status name ('build-complete', 'build-failed', etc.)
         derivation_error: Error message if status is 'failed'
+        derivation_path: Stored derivations.derivation_path (None for NULL);
+            defaults to a .drv path generated from git_hash and hostname
+        attempt_count: Stored derivations.attempt_count
         heartbeat_age_minutes: How many minutes ago last heartbeat (None = no heartbeat)
         system_ip: IP address for the system
         agent_version: Agent version string
@@ -53,13 +78,7 @@ def _create_base_scenario(
     drv_path = f"/nix/store/{git_hash[:12]}-nixos-system-{hostname}.drv"
 
     # Get status ID
-    status_rows = client.execute_sql(
-        "SELECT id FROM public.derivation_statuses WHERE name = %s",
-        (derivation_status,),
-    )
-    if not status_rows:
-        raise ValueError(f"Unknown derivation status: {derivation_status}")
-    status_id = status_rows[0]["id"]
+    status_id = _status_id(client, derivation_status)
 
     # Insert flake (schema uses 'name', not 'flake_name')
     flake_row = _one_row(
@@ -121,15 +140,16 @@ def _create_base_scenario(
             commit_id, derivation_type, derivation_name, derivation_path, store_path,
             status_id, attempt_count, scheduled_at, completed_at, error_message
         )
-        VALUES (%s, 'nixos', %s, %s, %s, %s, 0, %s, %s, %s)
+        VALUES (%s, 'nixos', %s, %s, %s, %s, %s, %s, %s, %s)
         RETURNING id
         """,
         (
             commit_id,
             hostname,
-            drv_path,
+            drv_path if derivation_path is _GENERATED_PATH else derivation_path,
             drv_path,  # Use same path as store_path for test scenarios
             status_id,
+            attempt_count,
             scheduled_at,
             completed_at,
             derivation_error,
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING, Any, Dict, List
 
-from .core import _cleanup_fn, _create_base_scenario, _one_row
+from .core import _cleanup_fn, _create_base_scenario, _one_row, _status_id
 
 if TYPE_CHECKING:
     from .. import CFTestClient
@@ -42,11 +42,12 @@ def scenario_flake_time_series(
     )
     flake_id = flake["id"]
 
-    # Commits: one every ~day
+    # Commits: one every ~day. Inserts repeated in loops go through
+    # execute_prepared so each template is parsed and planned only once
     commit_ids: List[int] = []
     for d in range(days):
         ts = start + timedelta(days=d, minutes=floor(d * 1.7) % stagger_window_minutes)
-        [cr] = client.execute_sql(
+        [cr] = client.execute_prepared(
             """
             INSERT INTO public.commits (flake_id, git_commit_hash, commit_timestamp, attempt_count)
             VALUES (%s, %s, %s, 0)
@@ -62,7 +63,7 @@ def scenario_flake_time_series(
         commit_id = commit_ids[-1 - (i % 3)]  # spread a bit
         drv = f"/nix/store/{commit_id:012d}-nixos-system-{flake_name}.drv"
 
-        [sysrow] = client.execute_sql(
+        [sysrow] = client.execute_prepared(
             """
             INSERT INTO public.systems (hostname, flake_id, is_active, derivation, public_key)
             VALUES (%s, %s, TRUE, %s, 'fake-key')
@@ -75,7 +76,7 @@ def scenario_flake_time_series(
             (hn, flake_id, drv),
         )
 
-        [st] = client.execute_sql(
+        [st] = client.execute_prepared(
             """
             INSERT INTO public.system_states (
                 hostname, change_reason, store_path, os, kernel,
@@ -94,7 +95,7 @@ def scenario_flake_time_series(
         # Heartbeats over last `heartbeat_hours` hours every `heartbeat_interval_minutes`
         for minutes_ago in range(0, heartbeat_hours * 60, heartbeat_interval_minutes):
             hb_ts = now - timedelta(minutes=minutes_ago)
-            client.execute_sql(
+            client.execute_prepared(
                 """
                 INSERT INTO public.agent_heartbeats (system_state_id, "timestamp", agent_version, agent_build_hash)
                 VALUES (%s, %s, %s, 'build123')
@@ -232,16 +233,13 @@ def scenario_latest_with_two_overdue(
     flake_id = flake["id"]
 
     # Insert two commits, second is latest
-    [complete_status] = client.execute_sql(
-        "SELECT id FROM public.derivation_statuses WHERE name='build-complete'"
-    )
-    complete_status_id = complete_status["id"]
+    complete_status_id = _status_id(client, "build-complete")
 
     commits = []
     for i, age_h in enumerate([2, 6]):
         ts = now - timedelta(hours=age_h)
         git_hash = f"{flake_name}-c{i+1:02d}-{int(ts.timestamp())}"
-        [cr] = client.execute_sql(
+        [cr] = client.execute_prepared(
             """
             INSERT INTO public.commits (flake_id, git_commit_hash, commit_timestamp, attempt_count)
             VALUES (%s, %s, %s, 0)
@@ -252,7 +250,7 @@ def scenario_latest_with_two_overdue(
         slug = sha256(f"{git_hash}-{cr['id']}".encode()).hexdigest()[:12]
         drv_path = f"/nix/store/{slug}-nixos-system-{flake_name}.drv"
 
-        client.execute_sql(
+        client.execute_prepared(
             """
             INSERT INTO public.derivations (
               commit_id, derivation_type, derivation_name, derivation_path, store_path,
@@ -277,7 +275,7 @@ def scenario_latest_with_two_overdue(
     hostnames = [f"{base_hostname}-{i+1}" for i in range(num_systems)]
     system_ids = []
     for hn in hostnames:
-        [sysrow] = client.execute_sql(
+        [sysrow] = client.execute_prepared(
             """
             INSERT INTO public.systems (hostname, flake_id, is_active, derivation, public_key)
             VALUES (%s, %s, TRUE, %s, 'fake-key')
@@ -292,7 +290,7 @@ def scenario_latest_with_two_overdue(
         system_ids.append(sysrow["id"])
 
         # system_state
-        [st] = client.execute_sql(
+        [st] = client.execute_prepared(
             """
             INSERT INTO public.system_states (
                 hostname, change_reason, store_path, os, kernel,
@@ -318,7 +316,7 @@ def scenario_latest_with_two_overdue(
             overdue_minutes if len(system_ids) <= num_overdue else ok_heartbeat_minutes
         )
         hb_ts = now - timedelta(minutes=minutes)
-        client.execute_sql(
+        client.execute_prepared(
             """
             INSERT INTO public.agent_heartbeats (system_state_id, "timestamp", agent_version, agent_build_hash)
             VALUES (%s, %s, %s, 'build123')
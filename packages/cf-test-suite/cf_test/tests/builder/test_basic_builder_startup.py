@@ -1,20 +1,15 @@
-import json
 import os
+import re
+import shlex
 
 import pytest
 
 pytestmark = [pytest.mark.builder, pytest.mark.integration]
 
-
-@pytest.fixture(scope="session")
-def derivation_paths():
-    """Load derivation paths from the test environment"""
-    drv_path = os.environ.get("CF_TEST_DRV")
-    if not drv_path:
-        pytest.fail("CF_TEST_DRV environment variable not set")
-
-    with open(drv_path, "r") as f:
-        return json.load(f)
+# Any of these lines shows the builder loops are alive
+_BUILDER_ACTIVITY = re.compile(
+    r"Memory - RSS:|No derivations need CVE scanning|crystal_forge::builder"
+)
 
 
 @pytest.fixture(scope="session")
@@ -143,8 +138,6 @@ def test_builder_has_required_tools(cf_client, cfServer):
     cfServer.log(f"Builder service environment: {service_env}")
 
     # Extract PATH from the environment
-    import re
-
     path_match = re.search(r"PATH=([^\s]+)", service_env)
     if not path_match:
         raise Exception("No PATH found in builder service environment")
@@ -152,24 +145,22 @@ def test_builder_has_required_tools(cf_client, cfServer):
     service_path = path_match.group(1)
     cfServer.log(f"Builder service PATH: {service_path}")
 
-    # Check each tool exists in the service PATH
+    # Resolve every tool against the service PATH in one VM call
     tools = ["nix", "git", "vulnix"]
+    lookup = cfServer.succeed(
+        f"export PATH={shlex.quote(service_path)}\n"
+        + "\n".join(
+            f"echo {tool} $(command -v {tool} || echo MISSING)" for tool in tools
+        )
+    )
+    resolved = dict(line.split(" ", 1) for line in lookup.strip().splitlines())
     for tool in tools:
-        found = False
-        for path_dir in service_path.split(":"):
-            tool_path = f"{path_dir}/{tool}"
-            try:
-                cfServer.succeed(f"test -x {tool_path}")
-                cfServer.log(f"✅ {tool} found at: {tool_path}")
-                found = True
-                break
-            except:
-                continue
-
-        if not found:
+        tool_path = resolved.get(tool, "MISSING")
+        if tool_path == "MISSING":
             raise Exception(
                 f"❌ {tool} not found in any PATH directory: {service_path}"
             )
+        cfServer.log(f"✅ {tool} found at: {tool_path}")
 
 
 def test_builder_directories_exist(cf_client, cfServer):
@@ -181,8 +172,11 @@ def test_builder_directories_exist(cf_client, cfServer):
         "/var/lib/crystal-forge/.cache",
     ]
 
-    for directory in directories:
-        cfServer.succeed(f"test -d {directory}")
+    # Check every directory in one VM round trip; report all missing ones
+    missing = cfServer.succeed(
+        "for d in " + " ".join(directories) + '; do [ -d "$d" ] || echo "$d"; done'
+    ).split()
+    assert not missing, f"Missing builder directories: {missing}"
 
 
 def test_builder_logs_show_startup(cf_client, cfServer):
@@ -217,18 +211,19 @@ def test_builder_database_connection(cf_client, cfServer):
         "sudo -u postgres psql -c \"SELECT 1 FROM pg_roles WHERE rolname='crystal_forge';\" | grep -q '1'"
     )
 
-    # Check no database errors in logs
-    logs = cfServer.succeed(
-        "journalctl -u crystal-forge-builder.service --since '2 minutes ago' --no-pager"
-    )
-
+    # Check no database errors in the last two minutes of logs; journalctl
+    # does the matching so only offending lines come back
     error_keywords = [
         "connection refused",
         "authentication failed",
         "role.*does not exist",
     ]
-    for keyword in error_keywords:
-        assert keyword not in logs.lower(), f"Found database error in logs: {keyword}"
+    errors = cfServer.succeed(
+        "journalctl -u crystal-forge-builder.service"
+        ' --since=@"$(($(date +%s) - 120))" -o cat -q --no-pager --case-sensitive=no'
+        f" --grep={shlex.quote('|'.join(error_keywords))} || true"
+    ).strip()
+    assert not errors, f"Found database error in logs: {errors}"
 
 
 def test_builder_can_build_derivations(cf_client, cfServer, derivation_paths):
@@ -243,34 +238,20 @@ def test_builder_can_build_derivations(cf_client, cfServer, derivation_paths):
 
     cfServer.log(f"Testing build capability with derivation: {drv_path}")
 
-    # Since build loop runs every 5 minutes, we'll check for CVE scan activity
-    # which proves the builder loops are working, then check for memory monitoring
-    # which shows the service is stable
-    try:
-        cf_client.wait_for_service_log(
-            cfServer,
-            "crystal-forge-builder.service",
-            "Memory - RSS:",
-            timeout=120,
-        )
+    # Since build loop runs every 5 minutes, look for any sign the builder loops
+    # are working (memory monitoring, CVE scanning, or general builder activity)
+    # with a single journal follow instead of a chain of waits
+    line = cf_client.wait_for_service_log(
+        cfServer,
+        "crystal-forge-builder.service",
+        _BUILDER_ACTIVITY,
+        timeout=120,
+    )
+    if "Memory - RSS:" in line:
         cfServer.log("✅ Builder memory monitoring is active")
-
-        cf_client.wait_for_service_log(
-            cfServer,
-            "crystal-forge-builder.service",
-            "No derivations need CVE scanning",
-            timeout=120,
-        )
+    elif "CVE scanning" in line:
         cfServer.log("✅ Builder is actively scanning for work")
-
-    except:
-        # Fallback: check for any builder activity
-        cf_client.wait_for_service_log(
-            cfServer,
-            "crystal-forge-builder.service",
-            "crystal_forge::builder",
-            timeout=60,
-        )
+    else:
         cfServer.log("✅ Builder service is showing activity")
 
 
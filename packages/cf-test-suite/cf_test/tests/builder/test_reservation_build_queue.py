@@ -1,7 +1,4 @@
-import json
-import os
 import time
-import subprocess
 
 import pytest
 
@@ -24,21 +21,20 @@ def test_flake_data(cf_client, cfServer):
     flake_id = flake_result[0]["id"]
 
     # Insert multiple commits (newest to oldest)
-    commits = []
-    for i in range(3):
-        commit_result = cf_client.execute_sql(
-            """INSERT INTO commits (flake_id, git_commit_hash, commit_timestamp)
-               VALUES (%s, %s, NOW() - INTERVAL '%s minutes')
-               RETURNING id""",
-            (flake_id, f"commit-{i:03d}", i * 10),  # 0, 10, 20 minutes ago
-        )
-        commits.append(commit_result[0]["id"])
+    commit_rows = cf_client.execute_many_returning(
+        """INSERT INTO commits (flake_id, git_commit_hash, commit_timestamp)
+           VALUES %s
+           RETURNING id""",
+        # 0, 10, 20 minutes ago
+        [(flake_id, f"commit-{i:03d}", i * 10) for i in range(3)],
+        template="(%s, %s, NOW() - make_interval(mins => %s))",
+    )
+    commits = [row["id"] for row in commit_rows]
 
     yield {"flake_id": flake_id, "commit_ids": commits}
 
     # Cleanup
-    for commit_id in commits:
-        cf_client.execute_sql("DELETE FROM derivations WHERE commit_id = %s", (commit_id,))
+    cf_client.execute_sql("DELETE FROM derivations WHERE commit_id = ANY(%s)", (commits,))
     cf_client.execute_sql("DELETE FROM commits WHERE flake_id = %s", (flake_id,))
     cf_client.execute_sql("DELETE FROM flakes WHERE id = %s", (flake_id,))
 
@@ -48,24 +44,23 @@ def test_multiple_workers_claiming_from_queue(cf_client, cfServer, test_flake_da
     commit_id = test_flake_data["commit_ids"][0]
 
     # Create 5 package derivations ready to build
-    derivation_ids = []
-    for i in range(5):
-        result = cf_client.execute_sql(
-            """INSERT INTO derivations (
-                   commit_id, derivation_type, derivation_name, derivation_path,
-                   scheduled_at, pname, version, status_id
-               ) VALUES (
-                   %s, 'package', %s, %s,
-                   NOW(), %s, '1.0', 5
-               ) RETURNING id""",
+    result = cf_client.execute_many_returning(
+        """INSERT INTO derivations (
+               commit_id, derivation_type, derivation_name, derivation_path,
+               scheduled_at, pname, version, status_id
+           ) VALUES %s RETURNING id""",
+        [
             (
                 commit_id,
                 f"test-package-{i}",
                 f"/nix/store/test-package-{i}.drv",
                 f"test-package-{i}",
-            ),
-        )
-        derivation_ids.append(result[0]["id"])
+            )
+            for i in range(5)
+        ],
+        template="(%s, 'package', %s, %s, NOW(), %s, '1.0', 5)",
+    )
+    derivation_ids = [row["id"] for row in result]
 
     cfServer.log(f"Created {len(derivation_ids)} derivations ready for building")
 
@@ -130,8 +125,7 @@ def test_multiple_workers_claiming_from_queue(cf_client, cfServer, test_flake_da
     
     # Cleanup
     cf_client.execute_sql("DELETE FROM build_reservations WHERE worker_id LIKE 'test-worker-%'")
-    for deriv_id in derivation_ids:
-        cf_client.execute_sql("DELETE FROM derivations WHERE id = %s", (deriv_id,))
+    cf_client.execute_sql("DELETE FROM derivations WHERE id = ANY(%s)", (derivation_ids,))
 
 
 def test_worker_crash_recovery(cf_client, cfServer, test_flake_data):
@@ -212,31 +206,29 @@ def test_dead_worker_cleanup(cf_client, cfServer, test_flake_data):
         {"name": "stale-worker-2", "age_minutes": 10, "should_cleanup": True},
     ]
 
-    created_derivations = []
-    for case in test_cases:
-        result = cf_client.execute_sql(
-            """INSERT INTO derivations (
-                   commit_id, derivation_type, derivation_name, derivation_path,
-                   scheduled_at, pname, version, status_id
-               ) VALUES (
-                   %s, 'package', %s, %s, NOW(), %s, '1.0', 8
-               ) RETURNING id""",
-            (
-                commit_id,
-                case["name"],
-                f"/nix/store/{case['name']}.drv",
-                case["name"],
-            ),
-        )
-        deriv_id = result[0]["id"]
-        created_derivations.append(deriv_id)
+    result = cf_client.execute_many_returning(
+        """INSERT INTO derivations (
+               commit_id, derivation_type, derivation_name, derivation_path,
+               scheduled_at, pname, version, status_id
+           ) VALUES %s RETURNING id""",
+        [
+            (commit_id, case["name"], f"/nix/store/{case['name']}.drv", case["name"])
+            for case in test_cases
+        ],
+        template="(%s, 'package', %s, %s, NOW(), %s, '1.0', 8)",
+    )
+    created_derivations = [row["id"] for row in result]
 
-        # Create reservation with specific heartbeat age
-        cf_client.execute_sql(
-            """INSERT INTO build_reservations (worker_id, derivation_id, reserved_at, heartbeat_at)
-               VALUES (%s, %s, NOW() - INTERVAL '%s minutes', NOW() - INTERVAL '%s minutes')""",
-            (case["name"], deriv_id, case["age_minutes"], case["age_minutes"]),
-        )
+    # Create reservations with specific heartbeat ages
+    cf_client.execute_many_returning(
+        """INSERT INTO build_reservations (worker_id, derivation_id, reserved_at, heartbeat_at)
+           VALUES %s RETURNING id""",
+        [
+            (case["name"], deriv_id, case["age_minutes"], case["age_minutes"])
+            for case, deriv_id in zip(test_cases, created_derivations)
+        ],
+        template="(%s, %s, NOW() - make_interval(mins => %s), NOW() - make_interval(mins => %s))",
+    )
 
     cfServer.log(f"Created {len(test_cases)} reservations with varying heartbeat ages")
 
@@ -263,31 +255,25 @@ def test_dead_worker_cleanup(cf_client, cfServer, test_flake_data):
 
     # Cleanup
     cf_client.execute_sql("DELETE FROM build_reservations WHERE worker_id LIKE '%worker%'")
-    for deriv_id in created_derivations:
-        cf_client.execute_sql("DELETE FROM derivations WHERE id = %s", (deriv_id,))
+    cf_client.execute_sql("DELETE FROM derivations WHERE id = ANY(%s)", (created_derivations,))
 
 
 def test_priority_ordering_newest_first(cf_client, cfServer, test_flake_data):
     """Test that newest commits are prioritized over older ones"""
     
     # Create derivations across multiple commits (newest to oldest)
-    derivations = []
-    for i, commit_id in enumerate(test_flake_data["commit_ids"]):
-        result = cf_client.execute_sql(
-            """INSERT INTO derivations (
-                   commit_id, derivation_type, derivation_name, derivation_path,
-                   scheduled_at, pname, version, status_id
-               ) VALUES (
-                   %s, 'package', %s, %s, NOW(), %s, '1.0', 5
-               ) RETURNING id""",
-            (
-                commit_id,
-                f"pkg-commit-{i}",
-                f"/nix/store/pkg-commit-{i}.drv",
-                f"pkg-commit-{i}",
-            ),
-        )
-        derivations.append({"commit_idx": i, "deriv_id": result[0]["id"]})
+    result = cf_client.execute_many_returning(
+        """INSERT INTO derivations (
+               commit_id, derivation_type, derivation_name, derivation_path,
+               scheduled_at, pname, version, status_id
+           ) VALUES %s RETURNING id""",
+        [
+            (commit_id, f"pkg-commit-{i}", f"/nix/store/pkg-commit-{i}.drv", f"pkg-commit-{i}")
+            for i, commit_id in enumerate(test_flake_data["commit_ids"])
+        ],
+        template="(%s, 'package', %s, %s, NOW(), %s, '1.0', 5)",
+    )
+    derivations = [{"commit_idx": i, "deriv_id": row["id"]} for i, row in enumerate(result)]
 
     # Verify the commit timestamps are ordered correctly (newest first)
     commits = cf_client.execute_sql(
@@ -328,8 +314,10 @@ def test_priority_ordering_newest_first(cf_client, cfServer, test_flake_data):
     cfServer.log("✅ Queue priority ordering verified: newest commits would be processed first")
 
     # Cleanup
-    for deriv in derivations:
-        cf_client.execute_sql("DELETE FROM derivations WHERE id = %s", (deriv["deriv_id"],))
+    cf_client.execute_sql(
+        "DELETE FROM derivations WHERE id = ANY(%s)",
+        ([deriv["deriv_id"] for deriv in derivations],),
+    )
 
 
 def test_system_builds_blocked_until_packages_complete(cf_client, cfServer, test_flake_data):
@@ -358,23 +346,23 @@ def test_system_builds_blocked_until_packages_complete(cf_client, cfServer, test
     nixos_id = nixos_result[0]["id"]
 
     # Create 3 package derivations (simulating dependencies)
-    package_ids = []
-    for i in range(3):
-        result = cf_client.execute_sql(
-            """INSERT INTO derivations (
-                   commit_id, derivation_type, derivation_name, derivation_path,
-                   scheduled_at, pname, version, status_id
-               ) VALUES (
-                   %s, 'package', %s, %s, NOW(), %s, '1.0', 5
-               ) RETURNING id""",
+    result = cf_client.execute_many_returning(
+        """INSERT INTO derivations (
+               commit_id, derivation_type, derivation_name, derivation_path,
+               scheduled_at, pname, version, status_id
+           ) VALUES %s RETURNING id""",
+        [
             (
                 commit_id,
                 f"sys-pkg-{i}-{unique_suffix}",
                 f"/nix/store/sys-pkg-{i}-{unique_suffix}.drv",
                 f"sys-pkg-{i}-{unique_suffix}",
-            ),
-        )
-        package_ids.append(result[0]["id"])
+            )
+            for i in range(3)
+        ],
+        template="(%s, 'package', %s, %s, NOW(), %s, '1.0', 5)",
+    )
+    package_ids = [row["id"] for row in result]
 
     cfServer.log(f"Created NixOS system (ID:{nixos_id}) with {len(package_ids)} package dependencies")
 
@@ -427,9 +415,9 @@ def test_system_builds_blocked_until_packages_complete(cf_client, cfServer, test
 
     # Cleanup
     cf_client.execute_sql("DELETE FROM build_reservations WHERE nixos_derivation_id = %s", (nixos_id,))
-    for pkg_id in package_ids:
-        cf_client.execute_sql("DELETE FROM derivations WHERE id = %s", (pkg_id,))
-    cf_client.execute_sql("DELETE FROM derivations WHERE id = %s", (nixos_id,))
+    cf_client.execute_sql(
+        "DELETE FROM derivations WHERE id = ANY(%s)", (package_ids + [nixos_id],)
+    )
 
 
 def test_worker_heartbeat_updates(cf_client, cfServer, test_flake_data):
@@ -1,9 +1,29 @@
-import os
+import re
+import shlex
+import time
 
 import pytest
 
 pytestmark = [pytest.mark.attic_cache]
 
+ATTIC_ENV_FILE = "/var/lib/crystal-forge/.config/crystal-forge-attic.env"
+ATTIC_CONFIG_FILE = "/var/lib/crystal-forge/config.toml"
+
+# Settings the configuration test expects, grepped for inside the VM
+ATTIC_CONFIG_SETTINGS = {
+    'cache_type = "Attic"': "Attic cache type not configured",
+    'attic_cache_name = "cf-test"': "Attic cache name not configured",
+}
+# Environment keys the configuration test expects, collected in one scan
+ATTIC_ENV_KEYS = re.compile(r"\b(ATTIC_TOKEN|ATTIC_SERVER_URL)=")
+
+
+@pytest.fixture(scope="session")
+def attic_env(cfServer):
+    """Builder's Attic env file, read once per session ("" if it can't be read)"""
+    code, out = cfServer.execute(f"cat {ATTIC_ENV_FILE}")
+    return out if code == 0 else ""
+
 
 def test_attic_server_status(cfServer, atticCache):
     """Check if the attic server is actually running"""
@@ -37,7 +57,7 @@ def test_attic_server_status(cfServer, atticCache):
         cfServer.log(f"❌ HTTP test failed: {e}")
 
 
-def test_cache_push_on_build_complete(cfServer, atticCache, cf_client):
+def test_cache_push_on_build_complete(cfServer, atticCache, cf_client, attic_env):
     """
     Test that Crystal Forge can successfully push a built package to Attic cache.
     
@@ -49,13 +69,7 @@ def test_cache_push_on_build_complete(cfServer, atticCache, cf_client):
     5. Verify success in database
     """
     # Check Attic is configured
-    try:
-        attic_env = cfServer.succeed(
-            "cat /var/lib/crystal-forge/.config/crystal-forge-attic.env"
-        )
-        if not attic_env.strip():
-            pytest.skip("Attic environment not configured in test VM")
-    except:
+    if not attic_env.strip():
         pytest.skip("Attic environment not configured in test VM")
 
     cfServer.log("=== Step 0: Stop server service (not needed for cache push testing) ===")
@@ -138,12 +152,11 @@ def test_cache_push_on_build_complete(cfServer, atticCache, cf_client):
     cfServer.log("=== Step 3: Waiting for cache worker to process job ===")
     
     # Poll database for cache job completion (up to 3 minutes)
-    import time
-    max_wait = 180  # 3 minutes
-    poll_interval = 5
-    elapsed = 0
+    deadline = time.time() + 180
+    delay = 0.25  # back off 0.25s, 0.5s, 1s, ... capped at 2s
+    last_status = None
     
-    while elapsed < max_wait:
+    while time.time() < deadline:
         # Check cache job status
         job_status = cf_client.execute_sql(
             """SELECT id, status, completed_at, error_message, attempts
@@ -156,7 +169,9 @@ def test_cache_push_on_build_complete(cfServer, atticCache, cf_client):
             error_msg = job_status[0]["error_message"]
             attempts = job_status[0]["attempts"]
             
-            cfServer.log(f"Cache job status: {status}, attempts: {attempts}")
+            if status != last_status:
+                cfServer.log(f"Cache job status: {status}, attempts: {attempts}")
+                last_status = status
             
             if status == "completed":
                 cfServer.log("✅ Cache push job completed successfully!")
@@ -190,8 +205,8 @@ def test_cache_push_on_build_complete(cfServer, atticCache, cf_client):
                 
                 assert False, f"Cache push job failed: {error_msg}"
         
-        time.sleep(poll_interval)
-        elapsed += poll_interval
+        time.sleep(min(delay, max(0, deadline - time.time())))
+        delay = min(2.0, delay * 2)
     
     else:
         # Timeout - gather diagnostics
@@ -230,7 +245,7 @@ def test_cache_push_on_build_complete(cfServer, atticCache, cf_client):
     cf_client.execute_sql("DELETE FROM flakes WHERE id = %s", (flake_id,))
 
 
-def test_attic_cache_authentication(cfServer, atticCache):
+def test_attic_cache_authentication(cfServer, atticCache, attic_env):
     """
     Test that Crystal Forge builder has Attic configured and can connect.
     This is a simpler check than waiting for an actual build.
@@ -247,10 +262,9 @@ def test_attic_cache_authentication(cfServer, atticCache):
 
     # Check env file exists
     try:
-        env_content = cfServer.succeed(
-            "cat /var/lib/crystal-forge/.config/crystal-forge-attic.env"
-        )
-        if "ATTIC_TOKEN" in env_content:
+        if not attic_env:
+            raise FileNotFoundError(ATTIC_ENV_FILE)
+        if "ATTIC_TOKEN" in attic_env:
             cfServer.log("✅ Attic environment file is configured with token")
         else:
             cfServer.log("❌ No ATTIC_TOKEN in environment file")
@@ -279,7 +293,7 @@ def test_attic_cache_authentication(cfServer, atticCache):
 
 
 @pytest.mark.skip("TODO: Fix this and make it better")
-def test_attic_cache_configuration(cfServer, cf_client):
+def test_attic_cache_configuration(cfServer, cf_client, attic_env):
     """
     Test that Crystal Forge is properly configured for Attic cache.
     Focus on configuration rather than client connectivity.
@@ -291,16 +305,13 @@ def test_attic_cache_configuration(cfServer, cf_client):
 
     # Check that the configuration includes Attic settings
     try:
-        # Use root to read the config since crystal-forge user has permission issues
-        config_content = cfServer.succeed("cat /var/lib/crystal-forge/config.toml")
-
-        # Verify Attic configuration is present
-        assert (
-            'cache_type = "Attic"' in config_content
-        ), "Attic cache type not configured"
-        assert (
-            'attic_cache_name = "cf-test"' in config_content
-        ), "Attic cache name not configured"
+        # Use root to read the config since crystal-forge user has permission issues;
+        # grep it in place so only the exit code comes back, not the whole file
+        for setting, message in ATTIC_CONFIG_SETTINGS.items():
+            code, _ = cfServer.execute(
+                f"grep -qF {shlex.quote(setting)} {ATTIC_CONFIG_FILE}"
+            )
+            assert code == 0, message
 
         cfServer.log("✅ Crystal Forge config contains Attic settings")
 
@@ -316,12 +327,12 @@ def test_attic_cache_configuration(cfServer, cf_client):
 
     # Check environment variables are available to the service
     try:
-        env_file = cfServer.succeed(
-            "cat /var/lib/crystal-forge/.config/crystal-forge-attic.env"
-        )
-        assert "ATTIC_TOKEN=" in env_file, "ATTIC_TOKEN not in environment file"
+        if not attic_env:
+            raise FileNotFoundError(ATTIC_ENV_FILE)
+        env_keys = set(ATTIC_ENV_KEYS.findall(attic_env))
+        assert "ATTIC_TOKEN" in env_keys, "ATTIC_TOKEN not in environment file"
         assert (
-            "ATTIC_SERVER_URL=" in env_file
+            "ATTIC_SERVER_URL" in env_keys
         ), "ATTIC_SERVER_URL not in environment file"
         cfServer.log("✅ Attic environment variables configured")
     except Exception as e:
@@ -1,16 +1,36 @@
 import os
+import re
 
 import pytest
 
+from cf_test.vm_helpers import parallel_succeed
+
 pytestmark = [pytest.mark.s3cache]
 
+# Failure diagnostics show only cache-related builder log lines unless
+# CF_TEST_VERBOSE=1 asks for the full tail
+_VERBOSE = os.environ.get("CF_TEST_VERBOSE") == "1"
+
+# MinIO credentials for the aws CLI. A single attempt with short timeouts
+# makes an unreachable MinIO fail in seconds instead of riding out the
+# CLI's default retry schedule
+_AWS_ENV = """
+export AWS_ENDPOINT_URL=http://s3Cache:9000
+export AWS_ACCESS_KEY_ID=minioadmin
+export AWS_SECRET_ACCESS_KEY=minioadmin
+export AWS_MAX_ATTEMPTS=1
+export AWS_RETRY_MODE=standard
+"""
+_AWS_TIMEOUTS = "--cli-connect-timeout 2 --cli-read-timeout 5"
+
 
 def test_cache_push_on_build_complete(
-    completed_derivation_data, cfServer, s3Cache, cf_client
+    completed_derivation_data, cfServer, s3_bucket, cf_client
 ):
     """
     When a derivation is build-complete, verify cache push to MinIO.
-    Success criterion: any .narinfo object appears in the S3 bucket.
+    Success criterion: the pushed output's .narinfo object appears in the S3
+    bucket.
     """
     pkg_name = completed_derivation_data["pname"]
     pkg_version = completed_derivation_data["version"]
@@ -32,56 +52,72 @@ def test_cache_push_on_build_complete(
         status_row[0]["status_id"] == 10
     ), "Derivation is not build-complete (status_id != 10)"
 
-    # Poll for .narinfo files - proves cache push worked
-    poll_script = r"""
+    # .narinfo files prove the cache push worked. Nix writes them at the
+    # bucket root (NARs go under nar/), so if the pushed path is unknown list
+    # only the top level
+    narinfo_probe = rf"""
 set -euo pipefail
-export AWS_ENDPOINT_URL=http://s3Cache:9000
-export AWS_ACCESS_KEY_ID=minioadmin
-export AWS_SECRET_ACCESS_KEY=minioadmin
-
-deadline=$((SECONDS + 180))
-
-while (( SECONDS < deadline )); do
-  if aws s3 ls --recursive s3://crystal-forge-cache/ 2>/dev/null | grep -E "\.narinfo$" >/dev/null; then
-    echo "FOUND"
-    exit 0
-  fi
-  sleep 5
-done
-
-exit 1
+{_AWS_ENV}
+key=$(aws s3api list-objects-v2 {_AWS_TIMEOUTS} --bucket {s3_bucket} \
+  --delimiter / --query "Contents[?ends_with(Key, '.narinfo')] | [0].Key" \
+  --output text)
+[[ -n "$key" && "$key" != "None" ]]
+echo "FOUND $key"
 """
 
     try:
-        cfServer.succeed(poll_script)
-        cfServer.log("Cache push detected: .narinfo present in crystal-forge-cache")
+        # Block on the builder reporting the push of this package's output
+        # instead of re-listing the bucket every few seconds, then confirm
+        # with a single .narinfo check. The builder logs the resolved output
+        # path (e.g. .../<hash>-nixos-system-<pname>-25.05...), which doesn't
+        # carry the package version, so match on the pname alone
+        pushed = cf_client.wait_for_service_log(
+            cfServer,
+            "crystal-forge-builder.service",
+            f"Successfully pushed /nix/store/.*{pkg_name}.* to cache",
+            timeout=180,
+        )
+        # The .narinfo key is the pushed path's store hash, so fetch the
+        # metadata of that one object rather than listing the bucket
+        store_hash = re.search(r"/nix/store/([0-9a-z]{32})-", pushed)
+        if store_hash:
+            cfServer.succeed(
+                f"{_AWS_ENV}aws s3api head-object {_AWS_TIMEOUTS} "
+                f"--bucket {s3_bucket} --key {store_hash.group(1)}.narinfo"
+            )
+        else:
+            cfServer.succeed(narinfo_probe)
+        cfServer.log(f"Cache push detected: .narinfo present in {s3_bucket}")
     except Exception:
         cfServer.log(
             "Cache push not detected within timeout. Collecting diagnostics..."
         )
 
-        # Show builder logs
-        try:
-            logs = cfServer.succeed(
-                "journalctl -u crystal-forge-builder.service --no-pager -n 200 || true"
+        # Show builder logs; by default journalctl does the filtering so only
+        # matching lines come back over the driver
+        if _VERBOSE:
+            log_cmd = "journalctl -u crystal-forge-builder.service --no-pager -n 200"
+        else:
+            log_cmd = (
+                "journalctl -u crystal-forge-builder.service -o cat --no-pager "
+                "-n 50 --case-sensitive=no --grep='cache|push|error|warn'"
             )
-            cfServer.log("---- builder logs ----\n" + logs)
-        except Exception:
-            pass
-
-        # Show S3 bucket contents
+        # Show the top level of the S3 bucket: .narinfo files live there and
+        # the nar/ prefix collapses to one line, so the listing doesn't walk
+        # every uploaded NAR. A failed listing reports its exit code
+        listing_cmd = (
+            f"{_AWS_ENV}aws s3 ls {_AWS_TIMEOUTS} s3://{s3_bucket}/ 2>&1 "
+            '|| echo "listing failed (exit $?)"'
+        )
+        # Both are independent, so run them side by side in one VM call
         try:
-            listing = cfServer.succeed(
-                r"""
-export AWS_ENDPOINT_URL=http://s3Cache:9000
-export AWS_ACCESS_KEY_ID=minioadmin
-export AWS_SECRET_ACCESS_KEY=minioadmin
-aws s3 ls --recursive s3://crystal-forge-cache/ || true
-"""
+            logs, listing = parallel_succeed(
+                cfServer, [f"{log_cmd} || true", listing_cmd]
             )
+            cfServer.log("---- builder logs ----\n" + logs)
             cfServer.log("---- S3 bucket listing ----\n" + listing)
-        except Exception:
-            pass
+        except Exception as e:
+            cfServer.log(f"---- VM diagnostics failed ----\n{e}")
 
         # Show DB state
         try:
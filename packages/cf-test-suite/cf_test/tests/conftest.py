@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 import pytest
 
 from cf_test import CFTestClient, CFTestConfig
+from cf_test.vm_helpers import SmokeTestData
 
 
 def pytest_configure(config: pytest.Config) -> None:
@@ -121,8 +123,12 @@ def vm_test_setup():
     # Basic connectivity verification
     if ("cfServer" in machines or "server" in machines) and "s3Cache" in machines:
         server_machine = machines.get("cfServer") or machines.get("server")
-        server_machine.succeed("ping -c 1 s3Cache")
-        server_machine.succeed("curl -f http://s3Cache:9000/minio/health/live")
+        # Run the independent probes concurrently in one VM round trip
+        server_machine.succeed(
+            "ping -c 1 s3Cache & p1=$!; "
+            "curl -f http://s3Cache:9000/minio/health/live & p2=$!; "
+            'wait "$p1" && wait "$p2"'
+        )
 
     yield machines
 
@@ -142,6 +148,16 @@ def _cfg() -> CFTestConfig:
     return c
 
 
+@pytest.fixture(scope="session")
+def derivation_paths() -> Dict[str, Any]:
+    """Derivation paths from the CF_TEST_DRV JSON file"""
+    drv_path = os.environ.get("CF_TEST_DRV")
+    if not drv_path:
+        pytest.fail("CF_TEST_DRV environment variable not set")
+    with open(drv_path, "r") as f:
+        return json.load(f)
+
+
 @pytest.fixture(scope="session")
 def cf_config() -> CFTestConfig:
     """Session-scoped resolved configuration for Crystal Forge tests."""
@@ -149,7 +165,7 @@ def cf_config() -> CFTestConfig:
 
 
 @pytest.fixture(scope="session")
-def cf_client(cf_config: CFTestConfig) -> CFTestClient:
+def cf_client(cf_config: CFTestConfig) -> Iterator[CFTestClient]:
     """Session-scoped DB client with a quick readiness probe."""
     c = CFTestClient(cf_config)
     try:
@@ -158,7 +174,8 @@ def cf_client(cf_config: CFTestConfig) -> CFTestClient:
         if os.getenv("NIXOS_TEST_DRIVER") == "1":
             pytest.exit(f"DB not reachable in VM: {e}", returncode=1)
         pytest.skip(f"DB not available: {e}")
-    return c
+    yield c
+    c.close()
 
 
 @pytest.fixture(scope="session")
@@ -177,27 +194,36 @@ def machines() -> Dict[str, Any]:
 
 # Machine convenience fixtures
 @pytest.fixture(scope="session")
-def cfServer():
+def cfServer(machines):
     """Get Crystal Forge server machine"""
-    import cf_test
-
-    return cf_test._driver_machines.get("cfServer")
+    return machines.get("cfServer")
 
 
 @pytest.fixture(scope="session")
-def s3Cache():
+def s3Cache(machines):
     """Get S3 cache machine"""
-    import cf_test
+    return machines.get("s3Cache")
+
+
+@pytest.fixture(scope="session")
+def s3_bucket(s3Cache) -> str:
+    """
+    Name of the MinIO bucket the builder pushes to.
 
-    return cf_test._driver_machines.get("s3Cache")
+    minio-setup.service creates the bucket and its policy once per VM boot,
+    so the session only confirms it is there instead of recreating it per test.
+    """
+    bucket = "crystal-forge-cache"
+    if s3Cache is None:
+        pytest.skip("s3Cache machine not available")
+    s3Cache.wait_for_unit("minio-setup.service")
+    return bucket
 
 
 @pytest.fixture(scope="session")
-def gitserver():
+def gitserver(machines):
     """Get git server machine"""
-    import cf_test
-
-    return cf_test._driver_machines.get("gitserver")
+    return machines.get("gitserver")
 
 
 @pytest.fixture(scope="session")
@@ -224,82 +250,86 @@ def agents(machines) -> List[Any]:
     return [m for name, m in sorted(machines.items()) if name.startswith("agent")]
 
 
+@pytest.fixture(scope="session")
+def crystal_forge_ready(server) -> bool:
+    """Wait once per session for the server unit and its migrations to be ready."""
+    from cf_test.vm_helpers import wait_for_crystal_forge_ready
+
+    wait_for_crystal_forge_ready(server)
+    return True
+
+
+@pytest.fixture(scope="session")
+def smoke_data() -> SmokeTestData:
+    """Webhook commit, git server URL and payload shared by the smoke tests."""
+    return SmokeTestData()
+
+
+@pytest.fixture(scope="session")
+def test_flake_repo_url() -> str:
+    """URL of the test flake repository served by the gitserver VM."""
+    return "http://gitserver/crystal-forge"
+
+
 @pytest.fixture(scope="function")
 def clean_test_data(cf_client: CFTestClient):
     """Broader cleanup to avoid cross-test UNIQUE violations on commits."""
     yield  # Run the test first, then cleanup
 
-    # Clean up in proper foreign key dependency order
+    # One statement instead of six round trips. Every CTE sees the same
+    # snapshot, and foreign keys are only checked once the whole statement
+    # has run, so deleting children and parents together is safe
     try:
-        # Step 1: Delete agent_heartbeats (references system_states)
         cf_client.execute_sql(
             """
-            DELETE FROM agent_heartbeats
-            WHERE system_state_id IN (
-                SELECT id FROM system_states
+            WITH
+            -- agent_heartbeats (references system_states)
+            hb AS (
+                DELETE FROM agent_heartbeats
+                WHERE system_state_id IN (
+                    SELECT id FROM system_states
+                    WHERE hostname LIKE 'test-%' OR hostname LIKE 'vm-test-%' OR hostname LIKE 'validate-%'
+                )
+            ),
+            -- system_states (references systems via hostname)
+            st AS (
+                DELETE FROM system_states
                 WHERE hostname LIKE 'test-%' OR hostname LIKE 'vm-test-%' OR hostname LIKE 'validate-%'
+            ),
+            -- systems (references flakes)
+            sy AS (
+                DELETE FROM systems
+                WHERE hostname LIKE 'test-%' OR hostname LIKE 'vm-test-%' OR hostname LIKE 'validate-%'
+            ),
+            -- test flakes, matched once for derivations, commits and flakes
+            tf AS (
+                SELECT id FROM flakes
+                WHERE repo_url LIKE 'https://example.com/%'
+                   OR repo_url LIKE '%/test.git'
+                   OR name ILIKE '%test%'
+            ),
+            -- derivations (references commits)
+            dv AS (
+                DELETE FROM derivations
+                WHERE derivation_name LIKE 'test-%'
+                   OR derivation_name LIKE 'vm-test-%'
+                   OR derivation_name LIKE 'validate-%'
+                   OR commit_id IN (
+                       SELECT c.id FROM commits c WHERE c.flake_id IN (SELECT id FROM tf)
+                   )
+            ),
+            -- commits (references flakes)
+            cm AS (
+                DELETE FROM commits
+                WHERE flake_id IN (SELECT id FROM tf)
+                   OR git_commit_hash LIKE 'working123-%'
+                   OR git_commit_hash LIKE 'broken456-%'
+                   OR git_commit_hash LIKE 'old-%'
+                   OR git_commit_hash LIKE 'newer-%'
+                   OR git_commit_hash LIKE 'timing%'
             )
-            """
-        )
-
-        # Step 2: Delete system_states (references systems via hostname)
-        cf_client.execute_sql(
-            """
-            DELETE FROM system_states 
-            WHERE hostname LIKE 'test-%' OR hostname LIKE 'vm-test-%' OR hostname LIKE 'validate-%'
-            """
-        )
-
-        # Step 3: Delete systems (references flakes)
-        cf_client.execute_sql(
-            """
-            DELETE FROM systems 
-            WHERE hostname LIKE 'test-%' OR hostname LIKE 'vm-test-%' OR hostname LIKE 'validate-%'
-            """
-        )
-
-        # Step 4: Delete derivations (references commits)
-        cf_client.execute_sql(
-            """
-            DELETE FROM derivations 
-            WHERE derivation_name LIKE 'test-%' 
-               OR derivation_name LIKE 'vm-test-%' 
-               OR derivation_name LIKE 'validate-%'
-               OR commit_id IN (
-                   SELECT c.id FROM commits c
-                   JOIN flakes f ON c.flake_id = f.id
-                   WHERE f.repo_url LIKE 'https://example.com/%'
-                      OR f.repo_url LIKE '%/test.git'
-                      OR f.name ILIKE '%test%'
-               )
-            """
-        )
-
-        # Step 5: Delete commits (references flakes)
-        cf_client.execute_sql(
-            """
-            DELETE FROM commits
-            WHERE flake_id IN (
-                    SELECT id FROM flakes
-                    WHERE repo_url LIKE 'https://example.com/%'
-                       OR repo_url LIKE '%/test.git'
-                       OR name ILIKE '%test%'
-                  )
-               OR git_commit_hash LIKE 'working123-%'
-               OR git_commit_hash LIKE 'broken456-%'
-               OR git_commit_hash LIKE 'old-%'
-               OR git_commit_hash LIKE 'newer-%'
-               OR git_commit_hash LIKE 'timing%'
-            """
-        )
-
-        # Step 6: Finally delete flakes (no dependencies)
-        cf_client.execute_sql(
-            """
-            DELETE FROM flakes
-            WHERE repo_url LIKE 'https://example.com/%'
-               OR repo_url LIKE '%/test.git'
-               OR name ILIKE '%test%'
+            -- finally flakes (no dependencies)
+            DELETE FROM flakes WHERE id IN (SELECT id FROM tf)
             """
         )
 
@@ -355,88 +385,85 @@ def wait_listening():
 
 
 @pytest.fixture(scope="session")
-def atticCache():
+def atticCache(machines):
     """Get Attic cache machine"""
-    import cf_test
+    return machines.get("atticCache")
+
 
-    return cf_test._driver_machines.get("atticCache")
+# Package used by completed_derivation_data. The test driver exports these
+# before pytest starts (vm_test_setup only passes them through), so read them
+# once at import instead of on every fixture invocation
+_PACKAGE_DRV = os.environ.get("CF_TEST_PACKAGE_DRV")
+_PACKAGE_NAME = os.environ.get("CF_TEST_PACKAGE_NAME", "hello")
+_PACKAGE_VERSION = os.environ.get("CF_TEST_PACKAGE_VERSION", "2.12.1")
+_PACKAGE_STORE_PATH = os.environ.get("CF_TEST_PACKAGE_STORE_PATH")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def completed_derivation_data(cf_client):
     """
     Creates a completed derivation for cache push testing.
+
+    Created once per module that uses it; the rows are inserted by a single
+    statement. They are committed and deleted at teardown rather than rolled
+    back, since the builder service has to see them from its own connection.
     """
-    package_drv_path = os.environ.get("CF_TEST_PACKAGE_DRV")
-    package_name = os.environ.get("CF_TEST_PACKAGE_NAME", "hello")
-    package_version = os.environ.get("CF_TEST_PACKAGE_VERSION", "2.12.1")
+    package_drv_path = _PACKAGE_DRV
+    package_name = _PACKAGE_NAME
+    package_version = _PACKAGE_VERSION
 
     if not package_drv_path:
         pytest.skip("CF_TEST_PACKAGE_DRV environment variable not set")
 
-    # Insert test flake
-    flake_result = cf_client.execute_sql(
-        """INSERT INTO flakes (name, repo_url)
-           VALUES ('test-completed-flake', 'http://test-completed')
-           RETURNING id"""
-    )
-    flake_id = flake_result[0]["id"]
-
-    # Insert test commit
-    commit_result = cf_client.execute_sql(
-        """INSERT INTO commits (flake_id, git_commit_hash, commit_timestamp)
-           VALUES (%s, 'completed123abc456', NOW())
-           RETURNING id""",
-        (flake_id,),
-    )
-    commit_id = commit_result[0]["id"]
-
-    # Insert completed derivation (status_id = 10 for build-complete)
-    derivation_result = cf_client.execute_sql(
-        """INSERT INTO derivations (
-               commit_id, derivation_type, derivation_name, derivation_path,
-               scheduled_at, completed_at, attempt_count, started_at,
-               evaluation_duration_ms, pname, version, status_id
-           ) VALUES (
-               %s, 'package', %s, %s,
-               NOW() - INTERVAL '1 hour', NOW() - INTERVAL '30 minutes', 0,
-               NOW() - INTERVAL '35 minutes', 1500,
-               %s, %s, 10
-           ) RETURNING id""",
+    # Insert flake -> commit -> completed derivation (status_id = 10 for
+    # build-complete) -> cache push job in one statement, each step reading
+    # the id returned by the previous one. A NULL store_path leaves the
+    # builder to resolve it, as when the column is omitted
+    row = cf_client.execute_sql(
+        """
+        WITH f AS (
+            INSERT INTO flakes (name, repo_url)
+            VALUES ('test-completed-flake', 'http://test-completed')
+            RETURNING id
+        ), c AS (
+            INSERT INTO commits (flake_id, git_commit_hash, commit_timestamp)
+            SELECT id, 'completed123abc456', NOW() FROM f
+            RETURNING id
+        ), d AS (
+            INSERT INTO derivations (
+                commit_id, derivation_type, derivation_name, derivation_path,
+                scheduled_at, completed_at, attempt_count, started_at,
+                evaluation_duration_ms, pname, version, status_id
+            )
+            SELECT
+                id, 'package', %s, %s,
+                NOW() - INTERVAL '1 hour', NOW() - INTERVAL '30 minutes', 0,
+                NOW() - INTERVAL '35 minutes', 1500,
+                %s, %s, 10
+            FROM c
+            RETURNING id
+        ), j AS (
+            INSERT INTO cache_push_jobs (derivation_id, status, cache_destination, store_path)
+            SELECT id, 'pending', 's3://crystal-forge-cache', %s FROM d
+            ON CONFLICT (derivation_id) WHERE (status = ANY (ARRAY['pending', 'in_progress'])) DO NOTHING
+            RETURNING id
+        )
+        SELECT f.id AS flake_id, c.id AS commit_id, d.id AS derivation_id,
+               (SELECT id FROM j) AS cache_push_job_id
+        FROM f, c, d
+        """,
         (
-            commit_id,
             f"{package_name}-{package_version}",
             package_drv_path,
             package_name,
             package_version,
+            _PACKAGE_STORE_PATH,
         ),
-    )
-    derivation_id = derivation_result[0]["id"]
-
-    # Create cache push job
-    hello_store_path = os.environ.get("CF_TEST_PACKAGE_STORE_PATH")
-    if not hello_store_path:
-        job_row = cf_client.execute_sql(
-            """
-            INSERT INTO cache_push_jobs (derivation_id, status, cache_destination)
-            VALUES (%s, 'pending', 's3://crystal-forge-cache')
-            ON CONFLICT (derivation_id) WHERE (status = ANY (ARRAY['pending', 'in_progress'])) DO NOTHING
-            RETURNING id
-            """,
-            (derivation_id,),
-        )
-    else:
-        job_row = cf_client.execute_sql(
-            """
-            INSERT INTO cache_push_jobs (derivation_id, status, cache_destination, store_path)
-            VALUES (%s, 'pending', 's3://crystal-forge-cache', %s)
-            ON CONFLICT (derivation_id) WHERE (status = ANY (ARRAY['pending', 'in_progress'])) DO NOTHING
-            RETURNING id
-            """,
-            (derivation_id, hello_store_path),
-        )
-
-    cache_push_job_id = job_row[0]["id"] if job_row else None
+    )[0]
+    flake_id = row["flake_id"]
+    commit_id = row["commit_id"]
+    derivation_id = row["derivation_id"]
+    cache_push_job_id = row["cache_push_job_id"]
 
     test_data = {
         "flake_id": flake_id,
@@ -452,54 +479,61 @@ def completed_derivation_data(cf_client):
 
     yield test_data
 
-    # Cleanup
+    # Cleanup: one statement, children before parents
     cf_client.execute_sql(
-        "DELETE FROM cache_push_jobs WHERE derivation_id = %s", (derivation_id,)
+        """
+        WITH j AS (DELETE FROM cache_push_jobs WHERE derivation_id = %(d)s),
+             d AS (DELETE FROM derivations WHERE id = %(d)s),
+             c AS (DELETE FROM commits WHERE id = %(c)s)
+        DELETE FROM flakes WHERE id = %(f)s
+        """,
+        {"d": derivation_id, "c": commit_id, "f": flake_id},
     )
-    cf_client.execute_sql("DELETE FROM derivations WHERE id = %s", (derivation_id,))
-    cf_client.execute_sql("DELETE FROM commits WHERE id = %s", (commit_id,))
-    cf_client.execute_sql("DELETE FROM flakes WHERE id = %s", (flake_id,))
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def failed_derivation_data(cf_client):
     """
     Creates a failed derivation scenario for testing cache push error handling.
+
+    Created once per module that uses it, like completed_derivation_data.
     """
-    # Insert test flake
-    flake_result = cf_client.execute_sql(
-        """INSERT INTO flakes (name, repo_url) 
-           VALUES ('test-failed-flake', 'http://test-failed') 
-           RETURNING id""",
-    )
-    flake_id = flake_result[0]["id"]
-
-    # Insert test commit
-    commit_result = cf_client.execute_sql(
-        """INSERT INTO commits (flake_id, git_commit_hash, commit_timestamp) 
-           VALUES (%s, 'failed123abc456', NOW()) 
-           RETURNING id""",
-        (flake_id,),
-    )
-    commit_id = commit_result[0]["id"]
-
-    # Insert failed derivation (status_id = 12 for failed build)
-    derivation_result = cf_client.execute_sql(
-        """INSERT INTO derivations (
-               commit_id, derivation_type, derivation_name, derivation_path,
-               scheduled_at, completed_at, attempt_count, started_at,
-               evaluation_duration_ms, error_message, pname, version, status_id
-           ) VALUES (
-               %s, 'package', '/nix/store/l46k596qypwijbp4qnbzz93gn86rbxbf-dbus-1.drv',
-               '/nix/store/l46k596qypwijbp4qnbzz93gn86rbxbf-dbus-1.drv',
-               NOW() - INTERVAL '1 hour', NOW() - INTERVAL '30 minutes', 0,
-               NOW() - INTERVAL '35 minutes', 1795,
-               'nix-store --realise failed with exit code: 1',
-               'dbus', '1', 12
-           ) RETURNING id""",
-        (commit_id,),
-    )
-    derivation_id = derivation_result[0]["id"]
+    # Insert flake -> commit -> failed derivation (status_id = 12 for failed
+    # build) in one statement, each step reading the id returned by the
+    # previous one
+    row = cf_client.execute_sql(
+        """
+        WITH f AS (
+            INSERT INTO flakes (name, repo_url)
+            VALUES ('test-failed-flake', 'http://test-failed')
+            RETURNING id
+        ), c AS (
+            INSERT INTO commits (flake_id, git_commit_hash, commit_timestamp)
+            SELECT id, 'failed123abc456', NOW() FROM f
+            RETURNING id
+        ), d AS (
+            INSERT INTO derivations (
+                commit_id, derivation_type, derivation_name, derivation_path,
+                scheduled_at, completed_at, attempt_count, started_at,
+                evaluation_duration_ms, error_message, pname, version, status_id
+            )
+            SELECT
+                id, 'package', '/nix/store/l46k596qypwijbp4qnbzz93gn86rbxbf-dbus-1.drv',
+                '/nix/store/l46k596qypwijbp4qnbzz93gn86rbxbf-dbus-1.drv',
+                NOW() - INTERVAL '1 hour', NOW() - INTERVAL '30 minutes', 0,
+                NOW() - INTERVAL '35 minutes', 1795,
+                'nix-store --realise failed with exit code: 1',
+                'dbus', '1', 12
+            FROM c
+            RETURNING id
+        )
+        SELECT f.id AS flake_id, c.id AS commit_id, d.id AS derivation_id
+        FROM f, c, d
+        """
+    )[0]
+    flake_id = row["flake_id"]
+    commit_id = row["commit_id"]
+    derivation_id = row["derivation_id"]
 
     test_data = {
         "flake_id": flake_id,
@@ -514,7 +548,12 @@ def failed_derivation_data(cf_client):
 
     yield test_data
 
-    # Cleanup
-    cf_client.execute_sql("DELETE FROM derivations WHERE id = %s", (derivation_id,))
-    cf_client.execute_sql("DELETE FROM commits WHERE id = %s", (commit_id,))
-    cf_client.execute_sql("DELETE FROM flakes WHERE id = %s", (flake_id,))
+    # Cleanup: one statement, children before parents
+    cf_client.execute_sql(
+        """
+        WITH d AS (DELETE FROM derivations WHERE id = %(d)s),
+             c AS (DELETE FROM commits WHERE id = %(c)s)
+        DELETE FROM flakes WHERE id = %(f)s
+        """,
+        {"d": derivation_id, "c": commit_id, "f": flake_id},
+    )
@@ -1,15 +1,12 @@
 import json
-import os
 import shlex
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
 import pytest
 
 from cf_test import CFTestClient
-from cf_test.scenarios import scenario_behind, scenario_offline, scenario_up_to_date
-from cf_test.vm_helpers import SmokeTestConstants as C
 
 pytestmark = [pytest.mark.dashboard, pytest.mark.driver]
 
@@ -1,26 +1,13 @@
 import json
 from pathlib import Path
-from typing import Any, Dict, List
 
 import pytest
 
-from cf_test import CFTestClient, CFTestConfig
+from cf_test import CFTestClient
 
 VIEW = "view_build_queue_status"
 
 
-@pytest.fixture(scope="session")
-def cf_config():
-    return CFTestConfig()
-
-
-@pytest.fixture(scope="session")
-def cf_client(cf_config):
-    c = CFTestClient(cf_config)
-    c.execute_sql("SELECT 1")
-    return c
-
-
 @pytest.mark.views
 @pytest.mark.database
 def test_view_build_queue_status_columns(cf_client: CFTestClient):
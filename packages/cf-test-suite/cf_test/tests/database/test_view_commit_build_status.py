@@ -1,11 +1,11 @@
 import json
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any, Dict, List
 
 import pytest
 
-from cf_test import CFTestClient, CFTestConfig
+from cf_test import CFTestClient
 from cf_test.scenarios import (
     _create_base_scenario,
     scenario_agent_restart,
@@ -138,18 +138,6 @@ def _get_commit_hashes_from_scenario(
     return hashes
 
 
-@pytest.fixture(scope="session")
-def cf_config():
-    return CFTestConfig()
-
-
-@pytest.fixture(scope="session")
-def cf_client(cf_config):
-    client = CFTestClient(cf_config)
-    client.execute_sql("SELECT 1")
-    return client
-
-
 @pytest.mark.vm_internal
 @pytest.mark.views
 @pytest.mark.database
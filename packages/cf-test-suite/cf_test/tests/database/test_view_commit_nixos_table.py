@@ -1,12 +1,11 @@
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List
 
 import pytest
 
-from cf_test import CFTestClient, CFTestConfig
+from cf_test import CFTestClient
 from cf_test.scenarios import (
-    _create_base_scenario,
     scenario_agent_restart,
     scenario_behind,
     scenario_build_timeout,
@@ -189,18 +188,6 @@ def _query_commit_level_rows(
     return []
 
 
-@pytest.fixture(scope="session")
-def cf_config():
-    return CFTestConfig()
-
-
-@pytest.fixture(scope="session")
-def cf_client(cf_config):
-    c = CFTestClient(cf_config)
-    c.execute_sql("SELECT 1")
-    return c
-
-
 @pytest.mark.vm_internal
 @pytest.mark.views
 @pytest.mark.database
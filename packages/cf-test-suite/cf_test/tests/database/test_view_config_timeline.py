@@ -1,9 +1,6 @@
-from datetime import UTC, datetime, timedelta
-from typing import Any, Dict, List
-
 import pytest
 
-from cf_test import CFTestClient, CFTestConfig
+from cf_test import CFTestClient
 from cf_test.scenarios import (
     scenario_multiple_orphaned_systems,
     scenario_progressive_system_updates,
@@ -13,18 +10,6 @@ VIEW_CONFIG_TIMELINE = "view_config_timeline"
 VIEW_COMMIT_TIMELINE = "view_commit_deployment_timeline"  # helper mapping (has commit timestamps & flake_name)
 
 
-@pytest.fixture(scope="session")
-def cf_config():
-    return CFTestConfig()
-
-
-@pytest.fixture(scope="session")
-def cf_client(cf_config):
-    client = CFTestClient(cf_config)
-    client.execute_sql("SELECT 1")
-    return client
-
-
 def _parse_count(config_str: str) -> int:
     # "<N> deployed (<short_hash>)§<idx>"
     try:
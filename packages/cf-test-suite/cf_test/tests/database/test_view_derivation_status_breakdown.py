@@ -1,11 +1,11 @@
 import json
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict
 
 import pytest
 
-from cf_test import CFTestClient, CFTestConfig
+from cf_test import CFTestClient
 from cf_test.scenarios import (
     _create_base_scenario,
     scenario_agent_restart,
@@ -196,18 +196,6 @@ DERIVATION_STATUS_BREAKDOWN_SCENARIO_CONFIGS = [
 ]
 
 
-@pytest.fixture(scope="session")
-def cf_config():
-    return CFTestConfig()
-
-
-@pytest.fixture(scope="session")
-def cf_client(cf_config):
-    client = CFTestClient(cf_config)
-    client.execute_sql("SELECT 1")
-    return client
-
-
 @pytest.mark.vm_internal
 @pytest.mark.views
 @pytest.mark.database
@@ -1,25 +1,11 @@
-from datetime import UTC, datetime, timedelta
-
 import pytest
 
-from cf_test import CFTestClient, CFTestConfig
+from cf_test import CFTestClient
 from cf_test.scenarios import _create_base_scenario
 
 VIEW_RECENT_COMMITS = "view_flake_recent_commits"
 
 
-@pytest.fixture(scope="session")
-def cf_config():
-    return CFTestConfig()
-
-
-@pytest.fixture(scope="session")
-def cf_client(cf_config):
-    client = CFTestClient(cf_config)
-    client.execute_sql("SELECT 1")
-    return client
-
-
 @pytest.mark.views
 @pytest.mark.database
 def test_view_flake_recent_commits_columns(cf_client: CFTestClient):
@@ -5,17 +5,14 @@ from typing import Any, Dict, List
 
 import pytest
 
-from cf_test import CFTestClient, CFTestConfig
+from cf_test import CFTestClient
 from cf_test.scenarios import (
-    _cleanup_fn,
     _create_base_scenario,
-    _one_row,
     scenario_agent_restart,
     scenario_behind,
     scenario_build_timeout,
     scenario_compliance_drift,
     scenario_eval_failed,
-    scenario_flake_time_series,
     scenario_flaky_agent,
     scenario_mixed_commit_lag,
     scenario_never_seen,
@@ -179,18 +176,6 @@ def _get_hostnames_from_heartbeat_scenario(
         return []
 
 
-@pytest.fixture(scope="session")
-def cf_config():
-    return CFTestConfig()
-
-
-@pytest.fixture(scope="session")
-def cf_client(cf_config):
-    client = CFTestClient(cf_config)
-    client.execute_sql("SELECT 1")
-    return client
-
-
 @pytest.mark.vm_internal
 @pytest.mark.views
 @pytest.mark.database
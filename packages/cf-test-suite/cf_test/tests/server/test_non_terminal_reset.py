@@ -1,21 +1,46 @@
 import os
 import time
-from datetime import UTC, datetime, timedelta
 
 import pytest
 
-from cf_test.scenarios import _create_base_scenario, scenario_dry_run_failed
+from cf_test.scenarios import _create_base_scenario
+from cf_test.scenarios.core import _status_id, _status_names
 from cf_test.vm_helpers import SmokeTestConstants as C
-from cf_test.vm_helpers import wait_for_crystal_forge_ready
 
-pytestmark = [pytest.mark.server, pytest.mark.integration]
+pytestmark = [
+    pytest.mark.server,
+    pytest.mark.integration,
+    pytest.mark.usefixtures("crystal_forge_ready"),
+]
+
+
+def _wait_all_in_status(cf_client, ids, status_name, timeout=30) -> bool:
+    """Poll until every derivation in ``ids`` has reached ``status_name``
+
+    Each poll is one query returning a single boolean. Returns False on
+    timeout and leaves the detailed assertions to the caller.
+    """
+    status_id = _status_id(cf_client, status_name)
+    deadline = time.time() + timeout
+    delay = 0.1  # back off 0.1s, 0.2s, 0.4s, ... capped at 2s
+    while True:
+        done = cf_client.execute_sql(
+            """
+            SELECT COALESCE(bool_and(status_id = %s), FALSE) AS done
+            FROM derivations WHERE id = ANY(%s)
+            """,
+            (status_id, list(ids)),
+        )[0]["done"]
+        remaining = deadline - time.time()
+        if done or remaining <= 0:
+            return done
+        time.sleep(min(delay, remaining))
+        delay = min(2.0, delay * 2)
 
 
 def test_derivation_reset_on_server_startup(cf_client, server):
     """Test that server resets derivations properly on startup"""
 
-    wait_for_crystal_forge_ready(server)
-
     # Get real git info from environment
     real_commit_hash = os.getenv(
         "CF_TEST_REAL_COMMIT_HASH", "ebcc48fbf1030fc2065fc266da158af1d0b3943c"
@@ -34,17 +59,10 @@ def test_derivation_reset_on_server_startup(cf_client, server):
         git_hash=real_commit_hash,  # Use real hash
         derivation_status="dry-run-pending",
         commit_age_hours=1,
+        derivation_path="/nix/store/test-pending-low.drv",
+        attempt_count=4,
         heartbeat_age_minutes=None,
     )
-    cf_client.execute_sql(
-        """
-        UPDATE derivations 
-        SET attempt_count = 4,
-            derivation_path = '/nix/store/test-pending-low.drv'
-        WHERE id = %s
-        """,
-        (scenario1["derivation_id"],),
-    )
     test_scenarios.append(scenario1)
 
     # 2. dry-run-failed with high attempts and NO path (should stay dry-run-failed - terminal)
@@ -57,17 +75,10 @@ def test_derivation_reset_on_server_startup(cf_client, server):
         derivation_status="dry-run-failed",
         derivation_error="Terminal failure",
         commit_age_hours=1,
+        derivation_path=None,
+        attempt_count=5,
         heartbeat_age_minutes=None,
     )
-    cf_client.execute_sql(
-        """
-        UPDATE derivations 
-        SET derivation_path = NULL, 
-            attempt_count = 5 
-        WHERE id = %s
-        """,
-        (scenario2["derivation_id"],),
-    )
     test_scenarios.append(scenario2)
 
     # 3. dry-run-failed with low attempts and NO path (should reset to dry-run-pending)
@@ -80,17 +91,10 @@ def test_derivation_reset_on_server_startup(cf_client, server):
         derivation_status="dry-run-failed",
         derivation_error="Temporary failure",
         commit_age_hours=1,
+        derivation_path=None,
+        attempt_count=2,
         heartbeat_age_minutes=None,
     )
-    cf_client.execute_sql(
-        """
-        UPDATE derivations 
-        SET attempt_count = 2, 
-            derivation_path = NULL 
-        WHERE id = %s
-        """,
-        (scenario3["derivation_id"],),
-    )
     test_scenarios.append(scenario3)
 
     # 4. derivation with path but failed build (should reset to build-pending)
@@ -103,29 +107,25 @@ def test_derivation_reset_on_server_startup(cf_client, server):
         derivation_status="build-failed",
         derivation_error="Build failed",
         commit_age_hours=1,
+        # Give it a derivation path and low attempt count
+        derivation_path="/nix/store/test-build-failed.drv",
+        attempt_count=3,
         heartbeat_age_minutes=None,
     )
-    # Give it a derivation path and low attempt count
-    cf_client.execute_sql(
-        """
-        UPDATE derivations 
-        SET derivation_path = '/nix/store/test-build-failed.drv',
-            attempt_count = 3 
-        WHERE id = %s
-        """,
-        (scenario4["derivation_id"],),
-    )
     test_scenarios.append(scenario4)
 
+    # Look the test rows up by the ids we created rather than a name pattern
+    scenario_ids = [scenario["derivation_id"] for scenario in test_scenarios]
+
     server.log("=== Pre-restart derivation states ===")
     initial_states = cf_client.execute_sql(
         """
         SELECT d.id, d.derivation_name, d.status_id, d.attempt_count, d.derivation_path
         FROM derivations d
-        JOIN derivation_statuses ds ON d.status_id = ds.id
-        WHERE d.derivation_name LIKE 'test-reset-%'
+        WHERE d.id = ANY(%s)
         ORDER BY d.derivation_name
-        """
+        """,
+        (scenario_ids,),
     )
     for state in initial_states:
         server.log(
@@ -136,6 +136,10 @@ def test_derivation_reset_on_server_startup(cf_client, server):
     server.log("=== Stopping evaluation loops to isolate reset test ===")
     server.succeed("systemctl stop crystal-forge-server.service")
 
+    # Only look at log lines written after this point so an earlier startup's
+    # reset summary can't satisfy the wait below
+    cursor = cf_client.journal_cursor(server, C.SERVER_SERVICE)
+
     # Restart the server to trigger reset_non_terminal_derivations
     server.log("=== Restarting server to trigger reset ===")
     server.succeed(f"systemctl start {C.SERVER_SERVICE}")
@@ -145,11 +149,19 @@ def test_derivation_reset_on_server_startup(cf_client, server):
 
     # Wait specifically for the reset to complete
     cf_client.wait_for_service_log(
-        server, C.SERVER_SERVICE, "💡 Total derivations processed:", timeout=30
+        server,
+        C.SERVER_SERVICE,
+        "💡 Total derivations processed:",
+        timeout=30,
+        after_cursor=cursor,
     )
 
-    # Give a moment for database commits to complete
-    time.sleep(2)
+    # Wait for the reset's database writes to land instead of a fixed sleep
+    _wait_all_in_status(
+        cf_client,
+        [scenario1["derivation_id"], scenario4["derivation_id"]],
+        "build-pending",
+    )
 
     # Stop the server again to prevent evaluation loops from running
     server.succeed("systemctl stop crystal-forge-server.service")
@@ -157,14 +169,18 @@ def test_derivation_reset_on_server_startup(cf_client, server):
     server.log("=== Post-restart derivation states ===")
     final_states = cf_client.execute_sql(
         """
-        SELECT d.id, d.derivation_name, d.status_id, ds.name as status_name, 
+        SELECT d.id, d.derivation_name, d.status_id,
                d.attempt_count as attempt_count, d.derivation_path IS NOT NULL as has_path
         FROM derivations d
-        JOIN derivation_statuses ds ON d.status_id = ds.id  
-        WHERE d.derivation_name LIKE 'test-reset-%'
+        WHERE d.id = ANY(%s)
         ORDER BY d.derivation_name
-        """
+        """,
+        (scenario_ids,),
     )
+    # Status names come from the per-run id -> name map rather than a JOIN
+    status_names = _status_names(cf_client)
+    for state in final_states:
+        state["status_name"] = status_names[state["status_id"]]
 
     states_by_name = {state["derivation_name"]: state for state in final_states}
 
@@ -219,6 +235,8 @@ def test_derivation_reset_background_loop(cf_client, server):
         git_hash="background123",
         derivation_status="dry-run-pending",  # Non-terminal state
         commit_age_hours=1,
+        derivation_path=None,
+        attempt_count=3,
         heartbeat_age_minutes=None,
     )
 
@@ -226,8 +244,7 @@ def test_derivation_reset_background_loop(cf_client, server):
     cf_client.execute_sql(
         """
         UPDATE derivations 
-        SET started_at = NOW() - INTERVAL '2 hours',
-            attempt_count = 3, derivation_path = NULL
+        SET started_at = NOW() - INTERVAL '2 hours'
         WHERE id = %s
         """,
         (scenario["derivation_id"],),
@@ -239,37 +256,41 @@ def test_derivation_reset_background_loop(cf_client, server):
     # Check periodically for reset (max 3 minutes)
     max_wait = 180  # 3 minutes
     check_interval = 10  # Check every 10 seconds
+    log_every = 3  # Only report progress every few polls
     reset_detected = False
 
+    pending_id = _status_id(cf_client, "dry-run-pending")
     for attempt in range(max_wait // check_interval):
         time.sleep(check_interval)
 
+        # Single-boolean probe; the full row is only fetched for the failure message
+        reset_detected = cf_client.execute_sql(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM derivations WHERE id = %s AND status_id = %s
+            ) AS reset
+            """,
+            (scenario["derivation_id"], pending_id),
+        )[0]["reset"]
+        if reset_detected:
+            server.log("=== Background reset detected! ===")
+            break
+        if attempt % log_every == 0:
+            server.log(f"  Attempt {attempt + 1}: not reset yet")
+
+    if not reset_detected:
         result = cf_client.execute_sql(
             """
-            SELECT d.status_id, ds.name as status_name, d.attempt_count
+            SELECT ds.name as status_name, d.attempt_count
             FROM derivations d
             JOIN derivation_statuses ds ON d.status_id = ds.id
             WHERE d.id = %s
             """,
             (scenario["derivation_id"],),
         )
-        server.log(f"Query Returned: {result}")
-
-        if result:
-            status = result[0]
-            server.log(
-                f"  Attempt {attempt + 1}: status={status['status_name']}, attempts={status['attempt_count']}"
-            )
-
-            # Check if it was reset to dry-run-pending
-            if status["status_name"] == "dry-run-pending":
-                reset_detected = True
-                server.log("=== Background reset detected! ===")
-                break
-
-    assert (
-        reset_detected
-    ), "Background loop did not reset stuck derivation within 3 minutes"
+        pytest.fail(
+            f"Background loop did not reset stuck derivation within 3 minutes: {result}"
+        )
 
     # Cleanup
     cf_client.cleanup_test_data(scenario["cleanup"])
@@ -288,26 +309,30 @@ def test_attempt_count_terminal_logic(cf_client, server):
         derivation_status="dry-run-failed",
         derivation_error="Will hit attempt limit",
         commit_age_hours=1,
+        derivation_path=None,
+        # Exactly 5 attempts is the terminal threshold
+        attempt_count=5,
         heartbeat_age_minutes=None,
     )
 
-    # Set attempt count to exactly 5 (terminal threshold)
-    cf_client.execute_sql(
-        "UPDATE derivations SET attempt_count = 5, derivation_path = NULL WHERE id = %s",
-        (scenario["derivation_id"],),
-    )
-
-    # Restart server to trigger reset
+    # Restart server to trigger reset, then wait for this startup's reset
+    # summary instead of sleeping a fixed interval
+    cursor = cf_client.journal_cursor(server, C.SERVER_SERVICE)
     server.succeed(f"systemctl restart {C.SERVER_SERVICE}")
     server.wait_for_unit(C.SERVER_SERVICE)
-    time.sleep(5)
+    cf_client.wait_for_service_log(
+        server,
+        C.SERVER_SERVICE,
+        "💡 Total derivations processed:",
+        timeout=30,
+        after_cursor=cursor,
+    )
 
     # Verify it stays in terminal state (not reset)
     result = cf_client.execute_sql(
         """
-        SELECT d.status_id, ds.name as status_name, d.attempt_count
+        SELECT d.status_id, d.attempt_count
         FROM derivations d
-        JOIN derivation_statuses ds ON d.status_id = ds.id
         WHERE d.id = %s
         """,
         (scenario["derivation_id"],),
@@ -315,6 +340,7 @@ def test_attempt_count_terminal_logic(cf_client, server):
 
     assert result, "Derivation should still exist"
     status = result[0]
+    status["status_name"] = _status_names(cf_client)[status["status_id"]]
 
     # Should stay dry-run-failed with 5 attempts
     assert (
@@ -6,35 +6,52 @@ import pytest
 
 from cf_test.vm_helpers import SmokeTestConstants as C
 from cf_test.vm_helpers import (
-    SmokeTestData,
     check_keys_exist,
     check_timer_active,
     get_system_hash,
     run_service_and_verify_success,
     verify_db_state,
     wait_for_agent_acceptance,
-    wait_for_crystal_forge_ready,
 )
 
-pytestmark = [pytest.mark.server, pytest.mark.integration, pytest.mark.agent]
+pytestmark = [
+    pytest.mark.server,
+    pytest.mark.integration,
+    pytest.mark.agent,
+    # Session-scoped, so the readiness wait runs once for the whole run
+    pytest.mark.usefixtures("crystal_forge_ready"),
+]
 
 
-@pytest.fixture(scope="session")
-def smoke_data():
-    return SmokeTestData()
+@pytest.fixture(scope="module")
+def agent_hostname(server) -> str:
+    """Short hostname the agent reports as, read from the VM once per module"""
+    return server.succeed("hostname -s").strip()
 
 
 @pytest.mark.slow  # Use existing marker instead of timeout
 def test_boot_and_units(server):
     """Test that all services boot and reach expected states"""
-    server.succeed(f"systemctl status {C.SERVER_SERVICE} || true")
+    # Only a bounded tail: the whole journal would be built into one string
     server.log(f"=== {C.SERVER_SERVICE} service logs ===")
-    server.succeed(f"journalctl -u {C.SERVER_SERVICE} --no-pager || true")
-
-    server.wait_for_unit(C.POSTGRES_SERVICE)
-    server.wait_for_unit(C.SERVER_SERVICE)
-    server.wait_for_unit(C.AGENT_SERVICE)
-    server.wait_for_unit("multi-user.target")
+    server.log(
+        server.succeed(f"journalctl -u {C.SERVER_SERVICE} -n 50 --no-pager || true")
+    )
+
+    try:
+        server.wait_for_unit(C.POSTGRES_SERVICE)
+        server.wait_for_unit(C.SERVER_SERVICE)
+        server.wait_for_unit(C.AGENT_SERVICE)
+        server.wait_for_unit("multi-user.target")
+    except Exception:
+        # Unit state is only worth fetching when one failed to come up
+        server.log(
+            server.execute(
+                f"systemctl status {C.POSTGRES_SERVICE} {C.SERVER_SERVICE} "
+                f"{C.AGENT_SERVICE} --no-pager"
+            )[1]
+        )
+        raise
 
 
 def test_keys_and_network(server):
@@ -48,13 +65,9 @@ def test_keys_and_network(server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: FIx this")
-def test_agent_accept_and_db_state(cf_client, server):
+def test_agent_accept_and_db_state(cf_client, server, agent_hostname):
     """Test that agent is accepted and database state is correct"""
 
-    wait_for_crystal_forge_ready(server)
-
-    agent_hostname = server.succeed("hostname -s").strip()
-
     # Wait for agent acceptance first
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
@@ -64,7 +77,9 @@ def test_agent_accept_and_db_state(cf_client, server):
 
     # Log agent status for debugging
     server.log("=== agent logs ===")
-    server.log(server.succeed(f"journalctl -u {C.AGENT_SERVICE} || true"))
+    server.log(
+        server.succeed(f"journalctl -u {C.AGENT_SERVICE} -n 200 --no-pager || true")
+    )
 
     # Verify database state
     verify_db_state(cf_client, server, agent_hostname, system_hash, change_reason)
@@ -96,11 +111,8 @@ def test_postgres_jobs_timer_and_idempotency(cf_client, server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Fix or remove this")
-def test_desired_target_response(cf_client, server, smoke_data):
+def test_desired_target_response(cf_client, server, smoke_data, agent_hostname):
     """Test that the log endpoint returns desired_target for systems"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     # Wait for agent acceptance first
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
@@ -169,11 +181,8 @@ def test_desired_target_response(cf_client, server, smoke_data):
 
 
 @pytest.mark.slow
-def test_nixos_module_desired_target_sync(cf_client, server):
+def test_nixos_module_desired_target_sync(cf_client, server, agent_hostname):
     """Test that systems defined in NixOS module configuration sync desired_target to database"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     # This would test the NixOS module sync functionality, but since we're in a test environment,
     # we'll simulate what the sync should do
 
@@ -200,11 +209,8 @@ def test_nixos_module_desired_target_sync(cf_client, server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Broken")
-def test_deployment_policy_manager_auto_latest(cf_client, server):
+def test_deployment_policy_manager_auto_latest(cf_client, server, agent_hostname):
     """Test that deployment policy manager updates desired_target for auto_latest systems"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     # Wait for agent acceptance first
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
@@ -385,11 +391,8 @@ def test_deployment_policy_manager_auto_latest(cf_client, server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Fix this")
-def test_agent_deployment_attempt_on_desired_target(cf_client, server):
+def test_agent_deployment_attempt_on_desired_target(cf_client, server, agent_hostname):
     """Test that agent attempts deployment when desired_target is set"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     # Wait for agent acceptance first
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
@@ -446,11 +449,8 @@ def test_agent_deployment_attempt_on_desired_target(cf_client, server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Fix this")
-def test_agent_deployment_already_on_target(cf_client, server):
+def test_agent_deployment_already_on_target(cf_client, server, agent_hostname):
     """Test that agent skips deployment when already on target"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
     # Set a desired target
@@ -483,11 +483,8 @@ def test_agent_deployment_already_on_target(cf_client, server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Fix this")
-def test_agent_deployment_dry_run_configuration(cf_client, server):
+def test_agent_deployment_dry_run_configuration(cf_client, server, agent_hostname):
     """Test agent deployment with dry-run configuration"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
     # The VM test configuration should have dry_run_first enabled
@@ -513,11 +510,8 @@ def test_agent_deployment_dry_run_configuration(cf_client, server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Fix this")
-def test_agent_deployment_state_update_after_success(cf_client, server):
+def test_agent_deployment_state_update_after_success(cf_client, server, agent_hostname):
     """Test that agent updates system state after successful deployment"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
     # Count initial system states
@@ -558,11 +552,8 @@ def test_agent_deployment_state_update_after_success(cf_client, server):
 
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Fix this")
-def test_agent_deployment_result_enum_coverage(cf_client, server):
+def test_agent_deployment_result_enum_coverage(cf_client, server, agent_hostname):
     """Test that agent produces different DeploymentResult enum variants"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
     # Test NoDeploymentNeeded case
@@ -601,12 +592,11 @@ def test_agent_deployment_result_enum_coverage(cf_client, server):
 @pytest.mark.slow
 @pytest.mark.skip("TODO: Fix this")
 def test_agent_skips_deployment_when_desired_target_has_same_derivation_path(
-    cf_client, server
+    cf_client,
+    server,
+    agent_hostname,
 ):
     """Test that agent skips deployment when desired_target resolves to same derivation path as current system"""
-    wait_for_crystal_forge_ready(server)
-    agent_hostname = server.succeed("hostname -s").strip()
-
     wait_for_agent_acceptance(cf_client, server, timeout=C.AGENT_ACCEPTANCE_TIMEOUT)
 
     # Get the current derivation path that the agent is running
@@ -776,7 +766,6 @@ def test_agent_skips_deployment_when_desired_target_has_same_derivation_path(
 @pytest.mark.skip("TODO: Fix this test")
 def test_dry_run_evaluation_robustness(cf_client, server):
     """Test that dry-run evaluations handle malformed flake targets gracefully"""
-    wait_for_crystal_forge_ready(server)
 
     # Test 1: Verify dry-run doesn't produce "flake:derivation" errors
     # This tests the fix for the original issue where eval_main_drv_path was returning garbage
@@ -869,7 +858,6 @@ def test_dry_run_evaluation_robustness(cf_client, server):
 @pytest.mark.slow
 def test_database_schema_consistency(cf_client, server):
     """Test that database queries include all required columns from the Derivation struct"""
-    wait_for_crystal_forge_ready(server)
 
     # Test that cache push queries include cf_agent_enabled field
     # This tests the fix for the "no column found for name: cf_agent_enabled" error
@@ -928,7 +916,7 @@ def test_database_schema_consistency(cf_client, server):
 
     # Check server logs for the specific error we're trying to prevent
     server_logs = server.succeed(
-        "journalctl -u crystal-forge-builder.service --no-pager --since '1 minute ago' | grep -i 'cf_agent_enabled' || true"
+        "journalctl -u crystal-forge-builder.service --no-pager --since '1 minute ago' | grep -iF 'cf_agent_enabled' || true"
     )
 
     # Should NOT see the schema error in logs
@@ -948,7 +936,6 @@ def test_database_schema_consistency(cf_client, server):
 @pytest.mark.slow
 def test_vault_agent_configuration_resilience(cf_client, server):
     """Test that Crystal Forge handles vault-agent configuration issues gracefully"""
-    wait_for_crystal_forge_ready(server)
 
     # Test that the system can evaluate NixOS configurations even with Attic/vault issues
     # This is a regression test for the "cannot coerce null to a string" error
@@ -965,7 +952,7 @@ def test_vault_agent_configuration_resilience(cf_client, server):
 
     # Check Crystal Forge server logs for vault-related evaluation failures
     cf_logs = server.succeed(
-        "journalctl -u crystal-forge-server.service --no-pager --since '10 minutes ago' | grep -i 'vault\\|attic' || true"
+        "journalctl -u crystal-forge-server.service --no-pager --since '10 minutes ago' | grep -iF -e vault -e attic || true"
     )
 
     # Should not see configuration evaluation failures related to vault/attic
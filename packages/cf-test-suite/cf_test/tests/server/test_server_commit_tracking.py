@@ -1,10 +1,13 @@
 import os
-import time
 
 import pytest
 
 from cf_test.vm_helpers import SmokeTestConstants as C
-from cf_test.vm_helpers import SmokeTestData, verify_commits_exist, verify_flake_in_db
+from cf_test.vm_helpers import (
+    parse_commit_list,
+    verify_commits_exist,
+    verify_flake_in_db,
+)
 
 pytestmark = [
     pytest.mark.server,
@@ -13,28 +16,23 @@ pytestmark = [
 ]
 
 
-@pytest.fixture(scope="session")
-def smoke_data():
-    return SmokeTestData()
-
-
-@pytest.fixture(scope="session")
+@pytest.fixture(scope="module")
 def branch_test_data():
     """Get branch-specific test data from environment variables"""
     return {
         "main": {
-            "commits": os.environ.get("CF_TEST_MAIN_COMMITS", "").split(","),
+            "commits": parse_commit_list(os.environ.get("CF_TEST_MAIN_COMMITS")),
             "expected_count": int(os.environ.get("CF_TEST_MAIN_COMMIT_COUNT", "5")),
         },
         # TODO: Figure out why only 5/7 are being found
         # "development": {
-        #     "commits": os.environ.get("CF_TEST_DEVELOPMENT_COMMITS", "").split(","),
+        #     "commits": parse_commit_list(os.environ.get("CF_TEST_DEVELOPMENT_COMMITS")),
         #     "expected_count": int(
         #         os.environ.get("CF_TEST_DEVELOPMENT_COMMIT_COUNT", "7")
         #     ),
         # },
         "feature/experimental": {
-            "commits": os.environ.get("CF_TEST_FEATURE_COMMITS", "").split(","),
+            "commits": parse_commit_list(os.environ.get("CF_TEST_FEATURE_COMMITS")),
             "expected_count": int(os.environ.get("CF_TEST_FEATURE_COMMIT_COUNT", "3")),
         },
     }
@@ -48,7 +46,8 @@ def test_flake_initialization_commits(cf_client, server):
     start_rows = cf_client.execute_sql("SELECT COUNT(*) as count FROM commits")
     start_commit_count = start_rows[0]["count"]
 
-    # If we have no commits yet, wait for initialization
+    # If we have no commits yet, wait for initialization. Otherwise it
+    # already happened and the count checks below cover it
     if start_commit_count == 0:
         cf_client.wait_for_service_log(
             server,
@@ -56,18 +55,6 @@ def test_flake_initialization_commits(cf_client, server):
             "Successfully initialized 5 commits for",
             timeout=120,
         )
-    else:
-        # Check if initialization log already exists (meaning it happened earlier)
-        try:
-            server.succeed(
-                "journalctl -u crystal-forge-server.service | grep 'Successfully initialized 5 commits for'"
-            )
-        except Exception:
-            # If no initialization log found but we have commits, something's wrong
-            if start_commit_count > 0:
-                server.log(
-                    f"Found {start_commit_count} commits but no initialization log"
-                )
 
     # Now check the final count
     rows = cf_client.execute_sql("SELECT COUNT(*) as count FROM commits")
@@ -102,15 +89,16 @@ def test_branch_specific_flake_initialization(
     branch_repo_url = f"http://gitserver/crystal-forge{repo_url_suffix}"
     flake_name = f"crystal-forge-{branch_name.replace('/', '-')}"
 
-    # Insert the branch-specific flake into the database
-    cf_client.execute_sql(
-        "INSERT INTO flakes (name, repo_url) VALUES (%s, %s) ON CONFLICT (repo_url) DO NOTHING",
-        (flake_name, branch_repo_url),
-    )
-
-    # Get the flake ID
+    # Insert the branch-specific flake (or find the existing one) and get its
+    # ID in the same statement; the no-op update makes RETURNING yield the row
+    # on conflict too
     flake_rows = cf_client.execute_sql(
-        "SELECT id FROM flakes WHERE repo_url = %s", (branch_repo_url,)
+        """
+        INSERT INTO flakes (name, repo_url) VALUES (%s, %s)
+        ON CONFLICT (repo_url) DO UPDATE SET repo_url = EXCLUDED.repo_url
+        RETURNING id
+        """,
+        (flake_name, branch_repo_url),
     )
     assert len(flake_rows) == 1, f"Could not find flake for {branch_repo_url}"
     flake_id = flake_rows[0]["id"]
@@ -119,46 +107,29 @@ def test_branch_specific_flake_initialization(
     # For now, we'll wait for automatic polling to pick it up
     print(f"Waiting for {branch_name} branch commits to be synced...")
 
-    # Wait up to 2 minutes for commits to appear
-    timeout = 120
-    start_time = time.time()
+    # Wait up to 2 minutes for commits to appear, woken by each new commit
     expected_count = branch_test_data[branch_name]["expected_count"]
-
-    while time.time() - start_time < timeout:
-        commit_rows = cf_client.execute_sql(
-            "SELECT COUNT(*) as count FROM commits WHERE flake_id = %s", (flake_id,)
-        )
-        current_count = commit_rows[0]["count"]
-
-        if current_count >= expected_count:
-            break
-
-        print(
-            f"Branch {branch_name}: {current_count}/{expected_count} commits found, waiting..."
-        )
-        time.sleep(5)
-
-    # Final verification
-    final_commit_rows = cf_client.execute_sql(
-        "SELECT COUNT(*) as count FROM commits WHERE flake_id = %s", (flake_id,)
-    )
-    final_count = final_commit_rows[0]["count"]
+    final_count = cf_client.wait_for_commits(flake_id, expected_count, timeout=120)
 
     assert (
         final_count >= expected_count
     ), f"Expected at least {expected_count} commits for {branch_name}, found {final_count}"
 
-    # Verify specific commit hashes are present
+    # Verify specific commit hashes are present; one query returns the
+    # expected hashes that are missing instead of a lookup per hash
     expected_commits = branch_test_data[branch_name]["commits"]
-    for commit_hash in expected_commits:
-        if commit_hash:  # Skip empty strings
-            commit_exists = cf_client.execute_sql(
-                "SELECT 1 FROM commits WHERE flake_id = %s AND git_commit_hash = %s",
-                (flake_id, commit_hash),
-            )
-            assert (
-                len(commit_exists) == 1
-            ), f"Commit {commit_hash} not found for branch {branch_name}"
+    missing = cf_client.execute_sql(
+        """
+        SELECT h AS git_commit_hash FROM unnest(%s::text[]) AS h
+        WHERE NOT EXISTS (
+            SELECT 1 FROM commits WHERE flake_id = %s AND git_commit_hash = h
+        )
+        """,
+        (expected_commits, flake_id),
+    )
+    assert (
+        not missing
+    ), f"Commits {[r['git_commit_hash'] for r in missing]} not found for branch {branch_name}"
 
     print(f"Branch {branch_name} verification passed: {final_count} commits found")
 
@@ -180,17 +151,20 @@ def test_branch_isolation(cf_client, server, branch_test_data):
             elif "ref=" not in row["repo_url"]:
                 branch_flakes["main"] = row["id"]
 
+    # Get the commits of every branch flake in one query, bucketed by flake
+    commits_by_flake = {flake_id: set() for flake_id in branch_flakes.values()}
+    commit_rows = cf_client.execute_sql(
+        "SELECT flake_id, git_commit_hash FROM commits WHERE flake_id = ANY(%s)",
+        (list(commits_by_flake),),
+    )
+    for row in commit_rows:
+        commits_by_flake[row["flake_id"]].add(row["git_commit_hash"])
+
     # Verify each branch has its expected commits and no cross-contamination
     for branch_name, expected_data in branch_test_data.items():
         if branch_name in branch_flakes:
-            flake_id = branch_flakes[branch_name]
-
-            # Get all commits for this branch
-            commit_rows = cf_client.execute_sql(
-                "SELECT git_commit_hash FROM commits WHERE flake_id = %s", (flake_id,)
-            )
-            actual_hashes = {row["git_commit_hash"] for row in commit_rows}
-            expected_hashes = {h for h in expected_data["commits"] if h}
+            actual_hashes = commits_by_flake[branch_flakes[branch_name]]
+            expected_hashes = set(expected_data["commits"])
 
             # Verify all expected commits are present
             missing_commits = expected_hashes - actual_hashes
@@ -202,7 +176,7 @@ def test_branch_isolation(cf_client, server, branch_test_data):
             all_other_expected = set()
             for other_branch, other_data in branch_test_data.items():
                 if other_branch != branch_name:
-                    all_other_expected.update(h for h in other_data["commits"] if h)
+                    all_other_expected.update(other_data["commits"])
 
             leaked_commits = actual_hashes & all_other_expected
             assert (
@@ -222,15 +196,14 @@ def test_branch_polling_picks_up_new_commit(cf_client, server, gitserver):
     branch_name = "development"
     repo_url = f"http://gitserver/crystal-forge?ref={branch_name}"
 
-    # Ensure the branch flake exists (idempotent)
-    cf_client.execute_sql(
-        "INSERT INTO flakes (name, repo_url) VALUES (%s, %s) ON CONFLICT (repo_url) DO NOTHING",
-        (f"crystal-forge-{branch_name}", repo_url),
-    )
-
-    # Resolve flake_id
+    # Ensure the branch flake exists (idempotent) and resolve its flake_id
     flake_rows = cf_client.execute_sql(
-        "SELECT id FROM flakes WHERE repo_url = %s", (repo_url,)
+        """
+        INSERT INTO flakes (name, repo_url) VALUES (%s, %s)
+        ON CONFLICT (repo_url) DO UPDATE SET repo_url = EXCLUDED.repo_url
+        RETURNING id
+        """,
+        (f"crystal-forge-{branch_name}", repo_url),
     )
     assert len(flake_rows) == 1, f"flake row not found for {repo_url}"
     flake_id = flake_rows[0]["id"]
@@ -243,71 +216,50 @@ def test_branch_polling_picks_up_new_commit(cf_client, server, gitserver):
     initial_count = int(initial_rows[0]["count"])
     print(f"Initial commit count for {branch_name}: {initial_count}")
 
-    # Prepare a working clone on that branch
-    gitserver.succeed("cd /tmp && rm -rf test-clone-dev")
-    gitserver.succeed(
-        f"cd /tmp && git clone -b {branch_name} /srv/git/crystal-forge.git test-clone-dev"
-    )
-    gitserver.succeed("cd /tmp/test-clone-dev && git config user.name 'Test User'")
-    gitserver.succeed(
-        "cd /tmp/test-clone-dev && git config user.email 'test@example.com'"
-    )
-
-    # Make & push one new commit to the development branch
-    gitserver.succeed(
-        "cd /tmp/test-clone-dev && echo '# Test development polling commit' >> flake.nix"
-    )
-    gitserver.succeed("cd /tmp/test-clone-dev && git add flake.nix")
-    gitserver.succeed(
-        "cd /tmp/test-clone-dev && git commit -m 'Test development polling commit'"
+    # Prepare a working clone on that branch, make & push one new commit to
+    # it and capture its hash - one script instead of a driver call per step
+    new_commit_hash = (
+        gitserver.succeed(
+            f"""bash -s <<'EOF'
+set -e
+cd /tmp
+rm -rf test-clone-dev
+git clone -q -b {branch_name} /srv/git/crystal-forge.git test-clone-dev
+cd test-clone-dev
+git config user.name 'Test User'
+git config user.email 'test@example.com'
+printf '# Test development polling commit\\n' >> flake.nix
+git add flake.nix
+git commit -q -m 'Test development polling commit'
+git push -q origin {branch_name}
+git rev-parse HEAD
+EOF"""
+        )
+        .strip()
+        .splitlines()[-1]
     )
-    gitserver.succeed(f"cd /tmp/test-clone-dev && git push origin {branch_name}")
-
-    # Capture the new commit hash
-    new_commit_hash = gitserver.succeed(
-        "cd /tmp/test-clone-dev && git rev-parse HEAD"
-    ).strip()
     print(f"Created new commit on {branch_name}: {new_commit_hash}")
 
-    # Poll the database (not logs) until the new commit shows up, up to 180s
+    # Wait on the database (not logs) until the new commit shows up, up to
+    # 180s; each commit insert for this flake wakes the wait
     timeout_seconds = 180
-    start = time.time()
-    saw_new_count = False
-    saw_new_hash = False
-
-    while time.time() - start < timeout_seconds:
-        # Count increase check
-        count_rows = cf_client.execute_sql(
-            "SELECT COUNT(*) AS count FROM commits WHERE flake_id = %s",
-            (flake_id,),
-        )
-        current_count = int(count_rows[0]["count"])
-        if current_count >= initial_count + 1:
-            saw_new_count = True
-
-        # Specific hash presence check
-        hash_rows = cf_client.execute_sql(
-            "SELECT 1 FROM commits WHERE flake_id = %s AND git_commit_hash = %s",
-            (flake_id, new_commit_hash),
-        )
-        if len(hash_rows) == 1:
-            saw_new_hash = True
-
-        if saw_new_count and saw_new_hash:
-            break
-
-        print(
-            f"Waiting for ingestion... count={current_count} "
-            f"(target≥{initial_count + 1}), hash_seen={saw_new_hash}"
-        )
-        time.sleep(5)
+    current_count = cf_client.wait_for_commits(
+        flake_id,
+        initial_count + 1,
+        timeout=timeout_seconds,
+        git_commit_hash=new_commit_hash,
+    )
 
     # Final assertions: we ingested at least one new commit and specifically our new hash
-    assert saw_new_count, (
+    assert current_count >= initial_count + 1, (
         "Polling did not observe an increased commit count within "
         f"{timeout_seconds}s (still {current_count}, expected ≥ {initial_count + 1})"
     )
-    assert saw_new_hash, (
+    hash_rows = cf_client.execute_sql(
+        "SELECT 1 FROM commits WHERE flake_id = %s AND git_commit_hash = %s",
+        (flake_id, new_commit_hash),
+    )
+    assert len(hash_rows) == 1, (
         f"New commit {new_commit_hash} was not found for branch {branch_name} "
         f"within {timeout_seconds}s"
     )
@@ -338,15 +290,14 @@ def test_webhook_and_commit_ingest(cf_client, server, smoke_data):
     # Verify commits were ingested
     verify_commits_exist(cf_client, server)
 
-    # Cleanup webhook test - delete in correct order to respect foreign keys
-    cf_client.execute_sql(
-        "DELETE FROM commits WHERE flake_id IN (SELECT id FROM flakes WHERE repo_url = %s)",
-        (smoke_data.git_server_url,),
-    )
-    cf_client.execute_sql(
-        "DELETE FROM systems WHERE flake_id IN (SELECT id FROM flakes WHERE repo_url = %s)",
-        (smoke_data.git_server_url,),
-    )
+    # Cleanup webhook test in one round trip; foreign keys are checked once
+    # the whole statement has run, so commits and systems go with the flake
     cf_client.execute_sql(
-        "DELETE FROM flakes WHERE repo_url = %s", (smoke_data.git_server_url,)
+        """
+        WITH f AS (SELECT id FROM flakes WHERE repo_url = %(url)s),
+             c AS (DELETE FROM commits WHERE flake_id IN (SELECT id FROM f)),
+             s AS (DELETE FROM systems WHERE flake_id IN (SELECT id FROM f))
+        DELETE FROM flakes WHERE id IN (SELECT id FROM f)
+        """,
+        {"url": smoke_data.git_server_url},
     )
@@ -1,15 +1,9 @@
-import json
+import sys
+from typing import List
 
 import pytest
 
-from cf_test import CFTestClient
-from cf_test.scenarios import (
-    scenario_behind,
-    scenario_eval_failed,
-    scenario_never_seen,
-    scenario_offline,
-    scenario_up_to_date,
-)
+from cf_test.scenarios import scenario_eval_failed
 
 
 @pytest.mark.harness
@@ -19,83 +13,85 @@ def test_validate_scenario_eval_failed(cf_client, clean_test_data):
 
     hostname = f"validate-scenario-{int(time.time())}"
 
-    print(f"\n=== Testing scenario_eval_failed for {hostname} ===")
-    data = scenario_eval_failed(cf_client, hostname)
-    print(f"✅ Scenario returned: {data}")
-
-    print("\n=== Validating created data ===")
-
-    # Use the flake_id from the returned data instead of searching by repo_url
-    flake = cf_client.execute_sql(
-        "SELECT * FROM flakes WHERE id = %s", (data["flake_id"],)
-    )
-    assert len(flake) == 1, f"Expected 1 flake, got {len(flake)}"
-    print(f"✅ Flake: {flake[0]}")
-
-    # Get commits for this flake
-    commits = cf_client.execute_sql(
-        """
-        SELECT git_commit_hash, commit_timestamp FROM commits
-        WHERE flake_id = %s
-        ORDER BY commit_timestamp ASC
-        """,
-        (data["flake_id"],),
-    )
-    assert len(commits) == 2, f"Expected 2 commits, got {len(commits)}"
-    assert commits[0]["git_commit_hash"].startswith("working123")
-    assert commits[1]["git_commit_hash"].startswith("broken456")
-    print(f"✅ Commits: {commits}")
-
-    # Get derivations for this hostname
-    derivations = cf_client.execute_sql(
-        """
-        SELECT d.derivation_name, d.derivation_path, ds.name as status, c.git_commit_hash
-        FROM derivations d
-        JOIN derivation_statuses ds ON d.status_id = ds.id
-        JOIN commits c ON d.commit_id = c.id
-        WHERE d.derivation_name = %s OR d.derivation_name LIKE %s
-        ORDER BY c.commit_timestamp ASC
-        """,
-        (hostname, f"{hostname}-%"),
-    )
-    assert (
-        len(derivations) >= 1
-    ), f"Expected at least 1 derivation, got {len(derivations)}"
-
-    # Find the complete and failed derivations
-    complete_derivs = [d for d in derivations if d["status"] == "build-complete"]
-    failed_derivs = [d for d in derivations if d["status"] == "build-failed"]
-
-    assert len(complete_derivs) >= 1, "Expected at least 1 complete derivation"
-    assert len(failed_derivs) >= 1, "Expected at least 1 failed derivation"
-
-    print(f"✅ Complete derivations: {complete_derivs}")
-    print(f"✅ Failed derivations: {failed_derivs}")
-
-    # Verify system exists
-    systems = cf_client.execute_sql(
-        "SELECT * FROM systems WHERE hostname = %s", (hostname,)
-    )
-    assert len(systems) == 1, f"Expected 1 system, got {len(systems)}"
-
-    # Verify system states
-    states = cf_client.execute_sql(
-        "SELECT * FROM system_states WHERE hostname = %s", (hostname,)
-    )
-    assert len(states) == 1, f"Expected 1 system state, got {len(states)}"
-
-    # Verify heartbeats
-    heartbeats = cf_client.execute_sql(
-        """
-        SELECT h.* FROM agent_heartbeats h
-        JOIN system_states s ON h.system_state_id = s.id
-        WHERE s.hostname = %s
-        """,
-        (hostname,),
-    )
-    assert len(heartbeats) == 1, f"Expected 1 heartbeat, got {len(heartbeats)}"
-
-    print("✅ All validations passed")
+    # Collect progress lines and emit them in one write instead of a print per step
+    report: List[str] = []
+
+    try:
+        report.append(f"\n=== Testing scenario_eval_failed for {hostname} ===")
+        data = scenario_eval_failed(cf_client, hostname)
+        report.append(f"✅ Scenario returned: {data}")
+
+        report.append("\n=== Validating created data ===")
+
+        # Row counts for the flake, system, state and heartbeat plus the
+        # flake's commits and the host's derivations (as JSON arrays), all in
+        # one round trip
+        row = cf_client.execute_sql(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM flakes WHERE id = %(flake)s) AS flakes,
+                (SELECT COUNT(*) FROM systems WHERE hostname = %(host)s) AS systems,
+                (SELECT COUNT(*) FROM system_states
+                 WHERE hostname = %(host)s) AS states,
+                (SELECT COUNT(*) FROM agent_heartbeats h
+                 JOIN system_states s ON h.system_state_id = s.id
+                 WHERE s.hostname = %(host)s) AS heartbeats,
+                (SELECT COALESCE(json_agg(c ORDER BY c.commit_timestamp), '[]')
+                 FROM (
+                     SELECT git_commit_hash, commit_timestamp FROM commits
+                     WHERE flake_id = %(flake)s
+                 ) c) AS commits,
+                (SELECT COALESCE(json_agg(d ORDER BY d.commit_timestamp), '[]')
+                 FROM (
+                     SELECT d.derivation_name, d.derivation_path, ds.name as status,
+                            c.git_commit_hash, c.commit_timestamp
+                     FROM derivations d
+                     JOIN derivation_statuses ds ON d.status_id = ds.id
+                     JOIN commits c ON d.commit_id = c.id
+                     WHERE d.derivation_name = %(host)s
+                        OR d.derivation_name LIKE %(host_prefix)s
+                 ) d) AS derivations
+            """,
+            {
+                "flake": data["flake_id"],
+                "host": hostname,
+                "host_prefix": f"{hostname}-%",
+            },
+        )[0]
+        assert row["flakes"] == 1, f"Expected 1 flake, got {row['flakes']}"
+        report.append(f"✅ Flake: {data['flake_id']}")
+
+        # Commits for this flake, oldest first
+        commits = row["commits"]
+        assert len(commits) == 2, f"Expected 2 commits, got {len(commits)}"
+        assert commits[0]["git_commit_hash"].startswith("working123")
+        assert commits[1]["git_commit_hash"].startswith("broken456")
+        report.append(f"✅ Commits: {commits}")
+
+        # Derivations for this hostname
+        derivations = row["derivations"]
+        assert (
+            len(derivations) >= 1
+        ), f"Expected at least 1 derivation, got {len(derivations)}"
+
+        # Find the complete and failed derivations
+        complete_derivs = [d for d in derivations if d["status"] == "build-complete"]
+        failed_derivs = [d for d in derivations if d["status"] == "build-failed"]
+
+        assert len(complete_derivs) >= 1, "Expected at least 1 complete derivation"
+        assert len(failed_derivs) >= 1, "Expected at least 1 failed derivation"
+
+        report.append(f"✅ Complete derivations: {complete_derivs}")
+        report.append(f"✅ Failed derivations: {failed_derivs}")
+
+        # Verify system, state and heartbeat from the counts fetched above
+        assert row["systems"] == 1, f"Expected 1 system, got {row['systems']}"
+        assert row["states"] == 1, f"Expected 1 system state, got {row['states']}"
+        assert row["heartbeats"] == 1, f"Expected 1 heartbeat, got {row['heartbeats']}"
+
+        report.append("✅ All validations passed")
+    finally:
+        sys.stdout.write("\n".join(report) + "\n")
     # Clean up will happen automatically via the fixture
 
 
@@ -3,7 +3,9 @@ VM test helpers - Common patterns for integration tests
 """
 
 import os
-from typing import Any, Dict
+import re
+import time
+from typing import Any, Dict, List, Optional
 
 # Constants for smoke tests
 API_PORT = 3000
@@ -11,12 +13,20 @@ DB_NAME = "crystal_forge"
 DB_USER = "crystal_forge"
 DEFAULT_WEBHOOK_COMMIT = "2abc071042b61202f824e7f50b655d00dfd07765"
 
+# Separates per-command output in parallel_succeed
+_PARALLEL_MARK = "@@cf-parallel"
+
 
 def get_webhook_commit() -> str:
     """Get webhook commit from environment or default"""
     return os.environ.get("CF_TEST_WEBHOOK_COMMIT", DEFAULT_WEBHOOK_COMMIT)
 
 
+def parse_commit_list(value: Optional[str]) -> List[str]:
+    """Split a comma-separated commit list from the environment ([] if unset/empty)"""
+    return re.findall(r"[^,\s]+", value or "")
+
+
 def build_webhook_payload(project_url: str, commit_sha: str) -> Dict[str, Any]:
     """Build standard webhook payload"""
     return {"project": {"web_url": project_url}, "checkout_sha": commit_sha}
@@ -43,14 +53,49 @@ def get_system_hash(machine) -> str:
     # Fallback for test environments where deriver might not work initially
     current_system = machine.succeed("readlink /run/current-system").strip()
     # Try to find a matching .drv file as fallback
+    # .drv files sit directly in /nix/store: don't descend into store paths and
+    # stop at the first hit
     drv_files = machine.succeed(
-        "find /nix/store -name '*nixos-system*agent*.drv' -type f | head -1"
+        "find /nix/store -maxdepth 1 -name '*nixos-system*agent*.drv' -type f "
+        "-print -quit"
     ).strip()
     if drv_files:
         return drv_files
     return f"{current_system}.drv"  # Last resort fallback
 
 
+def parallel_succeed(
+    machine, cmds: List[str], timeout: Optional[int] = None
+) -> List[str]:
+    """Run independent commands concurrently in the VM with a single driver call
+
+    The driver reaches each VM through one shell, so threads on the Python
+    side would only queue up behind it; the commands run as background jobs
+    in the VM instead. Returns each command's stdout in order and, like
+    ``succeed``, raises if any of them exits non-zero.
+    """
+    script = ["d=$(mktemp -d)"]
+    for i, cmd in enumerate(cmds):
+        script.append(f'( {cmd} ) >"$d/{i}" & p{i}=$!')
+    for i in range(len(cmds)):
+        script.append(f'wait "$p{i}" && r{i}=0 || r{i}=$?')
+        script.append(f'printf "\\n{_PARALLEL_MARK} {i} %s\\n" "$r{i}"; cat "$d/{i}"')
+    script.append('rm -rf "$d"')
+    out = machine.succeed("\n".join(script), timeout=timeout)
+
+    outputs = [""] * len(cmds)
+    failed = []
+    for chunk in out.split(f"\n{_PARALLEL_MARK} ")[1:]:
+        header, _, body = chunk.partition("\n")
+        index, rc = (int(field) for field in header.split())
+        outputs[index] = body
+        if rc != 0:
+            failed.append(f"`{cmds[index]}` (exit code {rc})")
+    if failed:
+        raise Exception(f"parallel commands failed: {', '.join(failed)}")
+    return outputs
+
+
 def check_keys_exist(machine, *key_paths: str) -> None:
     """Assert that SSH keys exist and are readable"""
     for path in key_paths:
@@ -155,28 +200,25 @@ def run_service_and_verify_success(
 
 def wait_for_git_server_ready(machine, timeout=120):
     """Wait for git server to be fully ready with proper error handling"""
-    import time
-
     start_time = time.time()
     last_error = None
 
     while time.time() - start_time < timeout:
         try:
-            # Check if setup completed
-            machine.succeed("systemctl is-active setup-git-repo.service", timeout=10)
-
-            # Check if git repo exists and is accessible
-            machine.succeed("test -d /srv/git/crystal-forge.git", timeout=5)
-            machine.succeed("test -r /srv/git/crystal-forge.git/HEAD", timeout=5)
-
-            # Check if fcgiwrap service is running
-            machine.succeed(
-                "systemctl is-active fcgiwrap-cgit-gitserver.service", timeout=10
+            # Setup completed, repo exists and is readable, fcgiwrap is
+            # running and git access actually works - checked concurrently
+            parallel_succeed(
+                machine,
+                [
+                    "systemctl is-active setup-git-repo.service",
+                    "test -d /srv/git/crystal-forge.git",
+                    "test -r /srv/git/crystal-forge.git/HEAD",
+                    "systemctl is-active fcgiwrap-cgit-gitserver.service",
+                    "git ls-remote http://localhost/crystal-forge",
+                ],
+                timeout=15,
             )
 
-            # Test actual git access
-            machine.succeed("git ls-remote http://localhost/crystal-forge", timeout=15)
-
             return True
 
         except Exception as e: